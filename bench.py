@@ -0,0 +1,220 @@
+"""
+Headless benchmarks for the tick loop, target selection and name generation
+
+    python bench.py                      # full run, results written to bench_output.txt
+    python bench.py --quick              # smaller sizes and fewer samples
+    python bench.py --baseline old.json  # also print the ratio of every metric against an earlier run
+
+Results are JSON: one record per case with its parameters and metrics, so two runs can be diffed or compared with
+--baseline. Every case is seeded, the same run always plays out the same battles.
+"""
+from __future__ import annotations
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from entity import Entity
+from event import Event
+from generators import FIRST_CORPUS, MONSTERS_CORPUS
+from markov import MarkovNameGenerator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+TEAM_SIZES = (10, 100, 1000, 10000)
+MAX_TARGETS = (1, 3)
+STANCES = ('skirmish', 'assassin')
+
+# rates are better higher, timings (_ms, _us) better lower, anything else is informational
+RATE_SUFFIX = '_per_sec'
+TIME_SUFFIXES = ('_ms', '_us')
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def make_entity(rng: random.Random, max_targets: int) -> Entity:
+    """A random mixed-stance soldier, stats in the range the demos use"""
+    return Entity(name=f'Unit{rng.randrange(10**6)}', attackrate=1, damage=rng.randint(1, 5),
+                  health=rng.randint(5, 20), range=rng.randint(1, 4), speed=rng.randint(1, 8),
+                  stance=rng.choice(STANCES), initiative=rng.randint(0, 10), max_targets=max_targets)
+
+
+def make_event(teamsize: int, max_targets: int, seed: int, engine: str = 'object') -> Event:
+    rng = random.Random(seed)
+    event = Event(size=max(100, teamsize * 4), engine=engine, log_retention=16, headless=True, seed=seed)
+
+    for _ in range(teamsize):
+        event.add_player(make_entity(rng, max_targets))
+
+    for _ in range(teamsize):
+        event.add_enemy(make_entity(rng, max_targets))
+
+    return event
+
+
+def bench_ticks(teamsize: int, max_targets: int, engine: str, ticks: int, seed: int = 0) -> dict:
+    """
+    Time single ticks, starting a new battle with the next seed whenever one ends so the roster stays populated
+
+    Setup is not timed.
+    """
+    samples = []
+    event = None
+
+    while len(samples) < ticks:
+        if event is None or not event.active:
+            event = make_event(teamsize, max_targets, seed, engine)
+            seed += 1
+
+        start = time.perf_counter()
+        ran = event.step(1)
+        elapsed = time.perf_counter() - start
+
+        if ran:
+            samples.append(elapsed)
+
+    return {
+        'ticks': len(samples),
+        'ticks_per_sec': len(samples) / sum(samples),
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+    }
+
+
+def bench_targets(teamsize: int, max_targets: int, calls: int, seed: int = 0) -> dict:
+    """
+    Time Entity.update_targets the way each stance calls it
+
+    The plain metrics drop the target cache before every call, so each one runs a full selection. The _cached ones
+    repeat the calls on an unchanged field, where every selection after the first is served from the cache.
+    """
+    event = make_event(teamsize, max_targets, seed)
+    entities = event.players + event.enemies
+    invalidate = event.target_cache.reset
+    result = {}
+
+    for stance, args in (('skirmish', ('distance', False, False)), ('assassin', ('range', True, True))):
+        start = time.perf_counter()
+        for i in range(calls):
+            invalidate()
+            entities[i % len(entities)].update_targets(*args)
+        elapsed = time.perf_counter() - start
+
+        result[f'{stance}_us'] = elapsed / calls * 10**6
+        result[f'{stance}_calls_per_sec'] = calls / elapsed
+
+        start = time.perf_counter()
+        for i in range(calls):
+            entities[i % len(entities)].update_targets(*args)
+        elapsed = time.perf_counter() - start
+
+        result[f'{stance}_cached_us'] = elapsed / calls * 10**6
+        result[f'{stance}_cached_calls_per_sec'] = calls / elapsed
+
+    return result
+
+
+def bench_names(corpus: list[str], k: int, avoid_training: bool, repeat: int, seed: int = 0) -> dict:
+    """Time generate_many on a freshly fitted order 3 model, fitting is not timed"""
+    gen = MarkovNameGenerator(order=3, seed=seed)
+    gen.fit(corpus)
+    names = 0
+    elapsed = 0.0
+
+    for i in range(repeat):
+        gen.reseed(seed + i)
+        start = time.perf_counter()
+        batch = gen.generate_many(k=k, max_len=16, min_len=3, avoid_training=avoid_training)
+        elapsed += time.perf_counter() - start
+        names += len(batch)
+
+    return {'names': names, 'names_per_sec': names / elapsed, 'attempts_last_batch': batch.attempts}
+
+
+def run(quick: bool = False) -> list[dict]:
+    sizes = TEAM_SIZES[:3] if quick else TEAM_SIZES
+    engines = ['object'] + (['array'] if numpy is not None else [])
+    records = []
+
+    def record(bench: str, params: dict, metrics: dict) -> None:
+        records.append({'bench': bench, 'params': params, 'metrics': metrics})
+        print(bench, params, {k: round(v, 3) for k, v in metrics.items()}, file=sys.stderr)
+
+    for teamsize in sizes:
+        # fewer samples on big rosters, one tick there already takes long enough to time reliably
+        ticks = max(10, (2000 if not quick else 200) // teamsize * 10)
+        calls = 2000 if not quick else 200
+
+        for max_targets in MAX_TARGETS:
+            for engine in engines:
+                record('tick', {'teamsize': teamsize, 'max_targets': max_targets, 'engine': engine},
+                       bench_ticks(teamsize, max_targets, engine, min(ticks, 1000)))
+
+            record('update_targets', {'teamsize': teamsize, 'max_targets': max_targets},
+                   bench_targets(teamsize, max_targets, calls))
+
+    for name, corpus in (('first', FIRST_CORPUS), ('monsters', MONSTERS_CORPUS)):
+        for avoid_training in (False, True):
+            record('generate_many', {'corpus': name, 'avoid_training': avoid_training},
+                   bench_names(corpus, 100, avoid_training, repeat=5 if quick else 20))
+
+    return records
+
+
+def key(record: dict) -> str:
+    return json.dumps([record['bench'], record['params']], sort_keys=True)
+
+
+def compare(records: list[dict], baseline: dict) -> None:
+    """Print each metric as a ratio against the baseline run, above 1.0 is an improvement"""
+    old = {key(r): r['metrics'] for r in baseline['results']}
+
+    for r in records:
+        before = old.get(key(r))
+        if before is None:
+            continue
+
+        for metric, value in r['metrics'].items():
+            if not value or not before.get(metric):
+                continue
+
+            if metric.endswith(RATE_SUFFIX):
+                ratio = value / before[metric]
+            elif metric.endswith(TIME_SUFFIXES):
+                ratio = before[metric] / value
+            else:
+                continue
+
+            print(f"{r['bench']:<15} {json.dumps(r['params'], sort_keys=True):<60} {metric:<24} {ratio:6.2f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='skip the largest team size and take fewer samples')
+    parser.add_argument('--output', default='bench_output.txt', help='where to write the JSON results')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    args = parser.parse_args()
+
+    results = run(quick=args.quick)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': numpy.__version__ if numpy is not None else None,
+            'quick': args.quick,
+            'results': results,
+        }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare(results, json.load(f))
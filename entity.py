@@ -5,6 +5,12 @@ from operator import itemgetter
 
 
 class Entity:
+    # plain value fields, what snapshot() returns
+    FIELDS = ('id', 'isplayer', 'name', 'attackrate', 'damage', 'max_health', 'health', 'range', 'speed',
+              'max_targets', 'initiative', 'position', 'last_attack', 'stance')
+
+    __slots__ = FIELDS + ('targets', 'event', '_uuid', '_selection')
+
     def __init__(self, name: str,
                  attackrate: int,
                  damage: int,
@@ -14,22 +20,65 @@ class Entity:
                  stance: str,
                  initiative: int = 0,
                  max_targets: int = 1) -> None:
-        self.id = str(uuid.uuid4())
+        # small int handed out by the Event the entity joins, see uuid for a globally unique reference
+        self.id = None
+        self._uuid = None
         self.isplayer = False
         self.name = name
-        self.attackrate = attackrate
-        self.damage = damage
-        self.max_health = health
-        self.health = health
-        self.range = range
-        self.speed = speed
-        self.max_targets = max_targets
-        self.initiative = initiative
+        self.attackrate = int(attackrate)
+        self.damage = int(damage)
+        self.max_health = int(health)
+        self.health = int(health)
+        self.range = int(range)
+        self.speed = int(speed)
+        self.max_targets = int(max_targets)
+        self.initiative = int(initiative)
         self.position = None
         self.last_attack = None
         self.targets = []
         self.event = None
         self.stance = stance
+        # cached target picks, see spatial.TargetCache
+        self._selection = None
+
+    @classmethod
+    def from_template(cls, template, name: str | None = None) -> Entity:
+        """
+        New entity with a template's stats, skipping the int() coercion the template has already done
+
+        Keep in step with __init__, every slot must be set here too.
+        """
+        entity = cls.__new__(cls)
+        entity.id = None
+        entity._uuid = None
+        entity.isplayer = False
+        entity.name = template.name if name is None else name
+        entity.attackrate = template.attackrate
+        entity.damage = template.damage
+        entity.max_health = template.health
+        entity.health = template.health
+        entity.range = template.range
+        entity.speed = template.speed
+        entity.max_targets = template.max_targets
+        entity.initiative = template.initiative
+        entity.position = None
+        entity.last_attack = None
+        entity.targets = []
+        entity.event = None
+        entity.stance = template.stance
+        entity._selection = None
+        return entity
+
+    @property
+    def uuid(self) -> str:
+        """Globally unique id for external references, generated on first use"""
+        if self._uuid is None:
+            self._uuid = str(uuid.uuid4())
+        return self._uuid
+
+    def snapshot(self) -> dict:
+        """Plain dict of the entity's value fields, without the targets and event references"""
+        return {k: getattr(self, k) for k in self.FIELDS}
 
     def attack(self, entity: Entity) -> int | None:
         entity.suffer(self.damage)
@@ -38,6 +87,7 @@ class Entity:
     def move(self, distance) -> int | None:
         if self.event:
             self.position = (self.position + distance) % self.event.size
+            self.event.reindex(self)
             return self.position
 
         return None
@@ -62,32 +112,80 @@ class Entity:
         """
         Pick a primary target based on prio_key criteria, add additional targets by distance
 
-        prio_key: entity key value to prioritize
+        prio_key: entity key value to prioritize, 'distance', 'range' and 'initiative' are served from the event's
+                  ring index, anything else falls back to a full scan
         reverse: whether to prioritize prio_key value by reverse order (descending)
-        sticky: optionally adds a uuid-based secondary sort to ensure initial target is maintained, only works for
+        sticky: optionally adds an id-based secondary sort to ensure initial target is maintained, only works for
                 fixed values like range, initiative, speed
         """
 
         if self.event:
-            elist = []
-            etype = self.event.enemies if self.isplayer else self.event.players
+            indexed = prio_key in ('range', 'initiative') or (prio_key == 'distance' and not reverse)
 
-            for e in etype:
-                tdis, tdir = self.shortest_distance(e.position)
-                elist.append({'target': e, 'range': e.range, 'distance': tdis, 'direction': tdir, 'id': e.id})
+            if not indexed:
+                return self._scan_targets(prio_key, reverse, sticky)
 
-            if sticky:
-                elist = sorted(elist, key=itemgetter('id'))
+            index = self.event.target_index(self)
 
-            targets = sorted(elist, key=itemgetter(prio_key), reverse=reverse)[:1]
-            remainder = sorted(elist, key=itemgetter(prio_key), reverse=reverse)[1:]
+            # only pick again when something relevant changed since the last pick
+            key = (prio_key, reverse, sticky)
+            selection = self.event.target_cache.lookup(self, key, index)
+            if selection is None:
+                selection = self._select(index, key)
 
-            if self.max_targets > 1:
-                secondary_targets = sorted(remainder, key=itemgetter('distance'))[:self.max_targets - 1]
-                targets += secondary_targets
+            targets = []
+            for e in selection:
+                tdis, tdir = self.shortest_distance(e.position)
+                targets.append({'target': e, 'range': e.range, 'distance': tdis, 'direction': tdir, 'id': e.id})
 
             self.targets = targets
 
             return self.targets
 
-        return None
\ No newline at end of file
+        return None
+
+    def _select(self, index, key: tuple) -> list:
+        """Pick targets from the ring index and store them in the event's target cache"""
+        prio_key, reverse, sticky = key
+
+        if prio_key == 'distance':
+            # ties by id when sticky, list order otherwise
+            rank = ('id', False, False) if sticky else None
+            found = index.nearest(self.position, max(self.max_targets, 1), rank=rank)
+            selection = [e for _, e in found]
+        else:
+            primary = index.best(prio_key, reverse, sticky)
+            if primary is None:
+                self.event.target_cache.store(self, key, [], -1)
+                return []
+
+            found = index.nearest(self.position, self.max_targets - 1, exclude=primary, rank=key)
+            selection = [primary] + [e for _, e in found]
+
+        # the primary of a stat pick doesn't depend on position, only the nearest picks have a radius
+        self.event.target_cache.store(self, key, selection, found[-1][0] if found else -1)
+
+        return selection
+
+    def _scan_targets(self, prio_key: str, reverse: bool, sticky: bool) -> list:
+        """Full scan over the opposing team, used for priority keys the index can't answer"""
+        elist = []
+        etype = self.event.enemies if self.isplayer else self.event.players
+
+        for e in etype:
+            tdis, tdir = self.shortest_distance(e.position)
+            elist.append({'target': e, 'range': e.range, 'distance': tdis, 'direction': tdir, 'id': e.id})
+
+        if sticky:
+            elist = sorted(elist, key=itemgetter('id'))
+
+        targets = sorted(elist, key=itemgetter(prio_key), reverse=reverse)[:1]
+        remainder = sorted(elist, key=itemgetter(prio_key), reverse=reverse)[1:]
+
+        if self.max_targets > 1:
+            secondary_targets = sorted(remainder, key=itemgetter('distance'))[:self.max_targets - 1]
+            targets += secondary_targets
+
+        self.targets = targets
+
+        return self.targets
\ No newline at end of file
@@ -1,115 +1,305 @@
 import time
 import io
+import logging
 import random
 import math
+import secrets
+
+from itertools import compress
 
 from entity import Entity
+from logs import DEATH, HIT, MOVE, CombatBuffer, CombatLog, StatusLog, StatusFrames
+from metrics import TickProfiler
+from snapshot import dump, load
+from spatial import RingIndex, TargetCache
+from stances import TickBuffers, kernel as stance_kernel
+
+
+# combat lines go out at INFO, decision traces at DEBUG, and only while an event has debug set. Where they end up is
+# the application's call, e.g. logging.basicConfig(level=logging.DEBUG, stream=sys.stdout, format='%(message)s')
+logger = logging.getLogger(__name__)
 
 
 class Event:
-    def __init__(self, size: int, debug: bool = False):
-        # in DB, entities would FK to Event, here we will process a list
+    def __init__(self, size: int, debug: bool = False, engine: str = 'object', log_retention: int | None = None,
+                 headless: bool = False, profile: bool = False, metrics_sink=None, seed: object = None,
+                 log_sink=None):
+        # in DB, entities FK to Event (see store.EventStore), here we will process a list
         # other things here would be hazards/biome modifiers
         self.size = size
         self.players = []
         self.enemies = []
-        self.attack_buffer = []
-        self.move_buffer = []
+        self.next_entity_id = 0
+        self.player_index = RingIndex(size)
+        self.enemy_index = RingIndex(size)
+        # set by the array engine, which never reads the indexes, they are re-sorted on the next object path read
+        self.indexes_stale = False
+        self.target_cache = TargetCache(size)
+        # per-row moves and attacks the stances decide on, reused every tick
+        self.tick_buffers = TickBuffers()
         self.last_updated = time.time()
         self.debug = debug
-        self.combat_log_buffer = []
-        self.combat_log = []
-        self.status_log = []
+        # combat records of the running tick, rendered to text only when someone reads them
+        self.combat_log_buffer = CombatBuffer()
+        # both logs keep the last log_retention ticks, None keeps the whole event. A logstore.LogSink keeps the whole
+        # history on disk instead
+        self.log_sink = log_sink
+        self.combat_log = CombatLog(log_retention, log_sink)
+        self.status_log = StatusLog(log_retention, log_sink)
         self.debug_log_buffer = []
         self.active = True
 
+        # headless events are driven by step()/run_until_done() and stamp logs with tick numbers, not wall time
+        self.headless = headless
+        self.tick_count = 0
+
+        # independent streams derived from one seed, so e.g. extra placements don't shift later tie-breaks. Without a
+        # seed one is drawn and kept, a misbehaving event can always be rerun from event.seed
+        self.seed = seed if seed is not None else secrets.randbits(64)
+        self.placement_rng = random.Random(f'{self.seed}:placement')
+        self.tiebreak_rng = random.Random(f'{self.seed}:tiebreak')
+        # for callers building rosters for this event, e.g. picking classes, the event itself never draws from it
+        self.generation_rng = random.Random(f'{self.seed}:generation')
+
+        # 'array' runs ticks as batched NumPy operations over the whole roster, see vectorized.ArrayEngine
+        if engine == 'array':
+            from vectorized import ArrayEngine
+            self.engine = ArrayEngine(self)
+        elif engine == 'object':
+            self.engine = None
+        else:
+            raise ValueError(f"unknown engine '{engine}', expected 'object' or 'array'")
+
+        # per-phase tick timings, None unless profiling is on so a normal tick only pays for a few None checks
+        self.profiler = None
+        if profile or metrics_sink:
+            self.enable_profiling(metrics_sink)
+
     def end(self) -> None:
+        if self.log_sink:
+            # the final tick is never committed to the combat log, its entry (how the event ended) goes straight out
+            if self.active and self.combat_log_buffer:
+                self.log_sink.combat(self.now(), *self.combat_log_buffer.freeze(), self.combat_log.names)
+            self.log_sink.flush()
         self.active = False
 
+    def rng_streams(self) -> list[random.Random]:
+        """Every random stream the simulation draws from, in the order snapshots store them"""
+        return [self.placement_rng, self.tiebreak_rng, self.generation_rng]
+
+    def snapshot(self) -> bytes:
+        """
+        Checkpoint the roster and RNG state in the compact binary format of snapshot.py
+
+        Logs are not included, a few dozen bytes per entity plus 2.5KB per RNG stream.
+        """
+        return dump(self)
+
+    @classmethod
+    def restore(cls, data: bytes, **kwargs) -> 'Event':
+        """Rebuild an event from snapshot(), kwargs are Event options (debug, engine, log_retention, ...)"""
+        return load(data, **kwargs)
+
+    @classmethod
+    def replay(cls, data: bytes, tick: int, **kwargs) -> 'Event':
+        """
+        Restore a snapshot headless and step it to tick
+
+        Ticks only depend on the roster and RNG state, so any later tick of the original event is rebuilt exactly,
+        as long as nobody joined after the snapshot was taken.
+        """
+        kwargs.setdefault('headless', True)
+        event = load(data, **kwargs)
+        event.step(tick - event.tick_count)
+        return event
+
+    def enable_profiling(self, sink=None) -> None:
+        """
+        Start recording per-phase tick timings and counters, see metrics.TickProfiler
+
+        sink: optional callable handed the record of every finished tick
+        """
+        if self.profiler is None:
+            self.profiler = TickProfiler(sink)
+        else:
+            self.profiler.sink = sink
+
+    def disable_profiling(self) -> None:
+        self.profiler = None
+
+    def metrics(self) -> dict | None:
+        """Snapshot of the profiler's timings and counters, None when profiling is off"""
+        return self.profiler.snapshot() if self.profiler else None
+
+    def now(self) -> float:
+        """Timestamp for log entries, the logical tick number when headless"""
+        return self.tick_count if self.headless else time.time()
+
+    def log_time(self, log) -> float:
+        """Timestamp of the next entry of log, a wall-clock event stamps its first entry 0"""
+        if self.headless or log:
+            return self.now()
+        return 0
+
+    def finish(self, msg: str) -> None:
+        self.write_combat_log(msg)
+        # write_combat_log already logged it in debug mode
+        if not self.headless and not self.debug:
+            logger.info(msg)
+        self.end()
+
+    def _assign_id(self, entity: Entity) -> None:
+        entity.id = self.next_entity_id
+        self.next_entity_id += 1
+
     def add_player(self, player: Entity) -> None:
-        player.position = (int((self.size / 2) - random.randrange(10,20))) + player.initiative
+        self._assign_id(player)
+        player.position = (int((self.size / 2) - self.placement_rng.randrange(10,20))) + player.initiative
         player.name += 'P'
         if self.debug:
-            print(f'adding player {player.name} at position {player.position}')
-        player.event = self
+            logger.debug('adding player %s at position %s', player.name, player.position)
         player.isplayer = True
-        self.players.append(player)
+        self.rejoin(player)
 
     def add_enemy(self, enemy: Entity) -> None:
-        enemy.position = (int((self.size / 2) + random.randrange(10, 20))) - enemy.initiative
+        self._assign_id(enemy)
+        enemy.position = (int((self.size / 2) + self.placement_rng.randrange(10, 20))) - enemy.initiative
+        if self.debug:
+            logger.debug('adding enemy %s at position %s', enemy.name, enemy.position)
+        self.rejoin(enemy)
+
+    def spawn(self, template, count: int, team: str) -> list[Entity]:
+        """
+        Put count entities of a templates.Template on the field in one go, team is 'players' or 'enemies'
+
+        Placement draws are the same as count add_player/add_enemy calls, but names and stats are shared with the
+        template and the ring index is sorted once.
+        """
+        if team == 'players':
+            name, side, index, sign = template.name + 'P', self.players, self.player_index, -1
+        elif team == 'enemies':
+            name, side, index, sign = template.name, self.enemies, self.enemy_index, 1
+        else:
+            raise ValueError(f"unknown team '{team}', expected 'players' or 'enemies'")
+
+        centre = self.size / 2
+        randrange = self.placement_rng.randrange
+        names = self.combat_log.names
+        spawned = []
+
+        for _ in range(count):
+            entity = Entity.from_template(template, name)
+            entity.id = self.next_entity_id
+            self.next_entity_id += 1
+            entity.position = int(centre + sign * randrange(10, 20)) - sign * template.initiative
+            entity.isplayer = sign < 0
+            entity.event = self
+            names[entity.id] = name
+            spawned.append(entity)
+
         if self.debug:
-            print(f'adding enemy {enemy.name} at position {enemy.position}')
-        enemy.event = self
-        self.enemies.append(enemy)
+            logger.debug('spawning %s %s on %s', count, name, team)
+
+        side += spawned
+        index.extend(spawned)
+        self.target_cache.joined()
+        if self.engine:
+            self.engine.stale = True
+
+        return spawned
+
+    def rejoin(self, entity: Entity) -> None:
+        """Put an entity that already has its id, position and side on the field, as restore does"""
+        entity.event = self
+        self.combat_log.names[entity.id] = entity.name
+
+        if entity.isplayer:
+            self.players.append(entity)
+            self.player_index.add(entity)
+            self.target_cache.joined()
+        else:
+            self.enemies.append(entity)
+            self.enemy_index.add(entity)
+            self.target_cache.joined()
+
+        if self.engine:
+            self.engine.stale = True
+
+    def refresh_indexes(self) -> None:
+        """Re-sort both ring indexes from the team lists if the array engine left them stale"""
+        if self.indexes_stale:
+            self.player_index.rebuild(self.players)
+            self.enemy_index.rebuild(self.enemies)
+            self.indexes_stale = False
+
+    def target_index(self, entity: Entity) -> RingIndex:
+        """Ring index of the team opposing entity"""
+        self.refresh_indexes()
+        return self.enemy_index if entity.isplayer else self.player_index
+
+    def reindex(self, entity: Entity) -> None:
+        self.refresh_indexes()
+        index = self.player_index if entity.isplayer else self.enemy_index
+        old = index.position(entity)
+        index.update(entity)
+        self.target_cache.moved(entity, old, entity.position)
 
     def move_entity(self, entity: Entity) -> None:
         entity.position = (entity.position + entity.speed) % self.size
+        self.reindex(entity)
         
     def update_combat_log(self):
-        if not self.combat_log_buffer:
-            timestamp = 0
-            buffer = []
-        else:
-            timestamp = time.time()
-            buffer = self.combat_log_buffer
-
-        self.combat_log.append({'time': timestamp, 'logs': buffer})
+        self.combat_log.record(self.log_time(self.combat_log), self.combat_log_buffer)
         self.clear_combat_log_buffer()
 
+    def record_combat(self, kind: int, actor: int, target: int = -1, amount: int = 0) -> None:
+        """Buffer a HIT, MOVE or DEATH record for the running tick, by entity id"""
+        self.combat_log_buffer.append(self.tick_count, kind, actor, target, amount)
+        if self.debug and logger.isEnabledFor(logging.INFO):
+            logger.info(self.combat_log.message(kind, actor, target, amount, ()))
+
     def write_combat_log(self, msg: str) -> None:
+        """Buffer a free-form message for the running tick"""
+        self.combat_log_buffer.text(self.tick_count, msg)
         if self.debug:
-            print(msg)
-        self.combat_log_buffer.append({'time': time.time(), 'msg': msg})
+            logger.info(msg)
 
     def read_combat_log(self, min_time: float = None, max_time: float = None) -> list:
-        buffer = self.combat_log
+        return [self.combat_log.render(i) for i in self.combat_log.between(min_time, max_time)]
 
-        if min_time:
-            buffer = [log for log in buffer if log['time'] >= min_time]
-        if max_time:
-            buffer = [log for log in buffer if log['time'] <= max_time]
+    def read_combat_log_since(self, cursor: int = 0) -> tuple[list, int]:
+        """
+        Combat log entries appended since cursor, and the cursor to pass on the next call
+        """
+        indices, cursor = self.combat_log.since(cursor)
+        return [self.combat_log.render(i) for i in indices], cursor
 
-        return buffer
+    def read_combat_log_buffer(self) -> list:
+        """Rendered lines of the tick in progress, or of the final tick once the event has ended"""
+        return self.combat_log.render_pending(self.now(), self.combat_log_buffer)
 
     def clear_combat_log_buffer(self) -> None:
-        self.combat_log_buffer = []
+        self.combat_log_buffer.clear()
         
     def update_status_log(self) -> None:
-        if not self.status_log:
-            timestamp = 0
-        else:
-            timestamp = time.time()
-
-        plist = []
-        elist = []
-
-
-        for player in self.players:
-            plist.append({k: v for k, v in player.__dict__.items() if not k.startswith('__')})
-
-        for enemy in self.enemies:
-            elist.append({k: v for k, v in enemy.__dict__.items() if not k.startswith('__')})
-
-        status = {'time': timestamp, 'players': plist, 'enemies': elist}
-        self.status_log.append(status)
-
-    def read_status_log(self, min_time: float = None, max_time: float = None) -> list:
-        buffer = self.status_log
+        self.status_log.record(self.log_time(self.status_log), self.players, self.enemies)
 
-        if min_time:
-            buffer = [status for status in buffer if status['time'] >= min_time]
+    def read_status_log(self, min_time: float = None, max_time: float = None) -> StatusFrames:
+        return StatusFrames(self.status_log, self.status_log.between(min_time, max_time))
 
-        if max_time:
-            buffer = [status for status in buffer if status['time'] <= max_time]
-
-        return buffer
+    def read_status_log_since(self, cursor: int = 0) -> tuple[StatusFrames, int]:
+        """
+        Status entries appended since cursor, and the cursor to pass on the next call
+        """
+        indices, cursor = self.status_log.since(cursor)
+        return StatusFrames(self.status_log, indices), cursor
 
     def clear_status_log(self) -> None:
-        self.status_log = []
+        self.status_log.clear()
         
     def write_debug_log(self, msg: str) -> None:
         if self.debug:
-            print(msg)
+            logger.debug(msg)
         self.debug_log_buffer.append(msg)
 
     def read_debug_log(self) -> list:
@@ -118,131 +308,183 @@ class Event:
     def clear_debug_log(self) -> None:
         self.debug_log_buffer = []
 
-    def action_assassin(self, entity: Entity) -> None:
+    def process_actions(self) -> None:
         """
-        Entity will prioritize target with the greatest range, and will not switch targets until dead
+        Run every stance's batch kernel over the live roster, filling the tick buffers, see stances.py
 
+        Raises ValueError for an entity whose stance has no registered kernel.
         """
+        acting = self.players + self.enemies
+        groups = {}
+        width = 1
+
+        for row, entity in enumerate(acting):
+            group = groups.get(entity.stance)
+            if group is None:
+                group = groups[entity.stance] = ([], [])
+            group[0].append(entity)
+            group[1].append(row)
+            if entity.max_targets > width:
+                width = entity.max_targets
+
+        # look every kernel up before running any, a roster with an unknown stance doesn't play half a tick
+        kernels = [(stance_kernel(stance), entities, rows) for stance, (entities, rows) in groups.items()]
+
+        buffers = self.tick_buffers
+        buffers.reset(acting, width)
+        for kernel, entities, rows in kernels:
+            kernel(self, entities, rows, buffers)
+
+    def apply_attacks(self) -> int:
+        """Land the attacks of the tick buffers in roster order, returns how many"""
+        buffers = self.tick_buffers
+        acting, moving, hits, nhits = buffers.entities, buffers.moving, buffers.hits, buffers.nhits
+        width = buffers.width
+        attacks = 0
+
+        for row in compress(range(buffers.rows), nhits):
+            if moving[row]:
+                continue
+
+            attacker = acting[row]
+            for slot in range(row * width, row * width + nhits[row]):
+                target = hits[slot]
+                self.record_combat(HIT, attacker.id, target.id, attacker.damage)
+                attacker.attack(entity=target)
+            attacks += nhits[row]
+
+        return attacks
+
+    def apply_moves(self, dead: set) -> int:
+        """Make the moves of the tick buffers in roster order, skipping anyone in dead, returns how many"""
+        buffers = self.tick_buffers
+        acting, moves = buffers.entities, buffers.moves
+        count = 0
+
+        for row in compress(range(buffers.rows), buffers.moving):
+            entity = acting[row]
+            if entity in dead:
+                continue
+            self.record_combat(MOVE, entity.id, amount=moves[row])
+            entity.move(distance=moves[row])
+            count += 1
+
+        return count
+
+    def cull(self, team: list, index: RingIndex, dead: set) -> None:
+        """Drop every entity at or below 0 health from a team list in one pass, adding them to dead"""
+        alive = []
+
+        for entity in team:
+            if entity.health <= 0:
+                self.record_combat(DEATH, entity.id)
+                index.remove(entity)
+                dead.add(entity)
+            else:
+                alive.append(entity)
 
-        targets = entity.update_targets(prio_key='range', reverse=True, sticky=True)
-
-        if self.debug:
-            print(f'{entity.name} is at position {entity.position} before processing actions')
-
-        move_buffer = []
-        attack_buffer = []
-        will_move = False
+        if len(alive) != len(team):
+            team[:] = alive
 
-        for target in targets:
-            # if we flag will_move then no reason to continue evaluating other targets
-            if will_move:
-                break
-
-            if self.debug:
-                print(f'{entity.name} looping targets: {target['target'].name}, {target['distance']},'
-                      f' {target['target'].position}')
+    def _tick(self) -> bool:
+        """
+        Run a single tick, returns False if the event ended instead
 
-            not_in_atk_range = entity.range < target['distance']
+        Noticing the end isn't a tick, tick_count and the profiler only see ticks that play out.
+        """
 
-            if not_in_atk_range:
-                will_move = True
-                dir = 1 if entity.position < target['target'].position else -1
+        # both sides can go down on the same tick now that all deaths resolve together
+        if not self.players and not self.enemies and self.next_entity_id:
+            self.finish("All players and enemies are dead")
+            return False
 
-                # Flip direction if outer
-                if target['direction'] != 'inner':
-                    dir *= -1
+        if self.players and not self.enemies:
+            self.finish("All enemies are dead")
+            return False
 
-                distance = (min(entity.speed, (abs(target['distance'] - entity.range)))) * dir
-                move_buffer.append((entity, distance))
+        if self.enemies and not self.players:
+            self.finish("All players are dead")
+            return False
 
-                if self.debug:
-                    print(f'{entity.name} move {distance} with range {entity.range} based on:'
-                          f'target: {target['target'].name} distance: {target["distance"]} range: {target['target'].range}'
-                          f' not_in_atk_range: {not_in_atk_range}')
+        self.tick_count += 1
+        prof = self.profiler
+        if prof:
+            prof.begin()
 
-            else:
-                if target['distance'] <= entity.range:
-                    attack_buffer.append((entity, target['target']))
+        if self.engine:
+            self.engine.tick()
 
-        if will_move:
-            self.move_buffer += move_buffer
         else:
-            self.attack_buffer += attack_buffer
-
+            # process actions for players and enemies
+            self.process_actions()
 
+            if prof:
+                prof.mark('actions')
 
-    def action_skirmish(self, entity: Entity) -> None:
-        """
-        Entity will prioritize targeting the closest targets, opting to "back up" and out-range when viable
+            # apply buffered attack actions
+            attacks = self.apply_attacks()
 
-        Define skirmish-specific actions here
-        """
+            if prof:
+                prof.mark('attacks')
 
-        targets = entity.update_targets(prio_key='distance', reverse=False, sticky=False)
+            # evaluate enemy then player health, compacting each list once
+            dead = set()
+            self.cull(self.enemies, self.enemy_index, dead)
+            self.cull(self.players, self.player_index, dead)
 
-        if self.debug:
-            print(f'{entity.name} is at position {entity.position} before processing actions')
+            if prof:
+                prof.mark('culling')
 
-        move_buffer = []
-        attack_buffer = []
-        will_move = False
-
-        for target in targets:
-            # if we flag will_move then no reason to continue evaluating other targets
-            if will_move:
-                break
+            # apply buffered move actions
+            moves = self.apply_moves(dead)
 
-            if self.debug:
-                print(f'{entity.name} looping targets: {target['target'].name}, {target['distance']},'
-                      f' {target['target'].position}')
+            if prof:
+                prof.mark('moves')
+                prof.count('attacks', attacks)
+                prof.count('moves', moves)
+                prof.count('deaths', len(dead))
 
-            not_in_atk_range = entity.range < target['distance']
-            worth_kiting = math.ceil(((min(entity.range, entity.speed) - target['target'].range)
-                                      / max(target['target'].speed, 1))) >= 2
-            in_enemy_range = target['target'].range >= target['distance']
+        if prof:
+            prof.count('log_lines', len(self.combat_log_buffer))
 
-            if not_in_atk_range or (worth_kiting and in_enemy_range):
-                will_move = True
-                dir = 1 if entity.position < target['target'].position else -1
+        self.update_status_log()
+        self.update_combat_log()
 
-                # Move away if too close
-                if target['distance'] < entity.range:
-                    dir *= -1
+        if prof:
+            prof.mark('logs')
+            prof.end(self)
 
-                # Flip direction if outer
-                if target['direction'] != 'inner':
-                    dir *= -1
+        return True
 
-                # Random direction if same position
-                if entity.position == target['target'].position:
-                    dir *= random.randint(-1, 1)
+    def step(self, n_ticks: int = 1) -> int:
+        """
+        Advance the simulation by n_ticks as fast as possible, regardless of wall time
 
-                distance = (min(entity.speed, (abs(target['distance'] - entity.range)))) * dir
-                move_buffer.append((entity, distance))
+        Returns the number of ticks actually run, fewer than n_ticks if the event ended
+        """
+        ran = 0
 
-                if self.debug:
-                    print(f'{entity.name} move {distance} with range {entity.range} based on:'
-                          f'target: {target['target'].name} distance: {target["distance"]} range: {target['target'].range}'
-                          f' not_in_atk_range: {not_in_atk_range},'
-                          f' or worth_kiting: {worth_kiting},'
-                          f' and in_enemy_range: {in_enemy_range}')
+        while ran < n_ticks and self.active:
+            if not self._tick():
+                break
+            ran += 1
 
-            else:
-                if target['distance'] <= entity.range:
-                    attack_buffer.append((entity, target['target']))
+        return ran
 
-        if will_move:
-            self.move_buffer += move_buffer
-        else:
-            self.attack_buffer += attack_buffer
+    def run_until_done(self, max_ticks: int | None = None) -> int:
+        """
+        Step until one side is wiped out, or max_ticks have run
 
-    def process_actions(self, entity: Entity) -> None:
-        if entity.stance == 'skirmish':
-            self.action_skirmish(entity)
+        An event nobody has joined yet, or a stalemate, never ends on its own, pass max_ticks if that can happen
+        """
+        ran = 0
 
-        elif entity.stance == 'assassin':
-            self.action_assassin(entity)
+        while self.active and (max_ticks is None or ran < max_ticks):
+            if not self._tick():
+                break
+            ran += 1
 
+        return ran
 
     def update(self) -> None:
         if self.active:
@@ -254,60 +496,10 @@ class Event:
 
             if ticks >= tickrate:
                 if self.debug:
-                    print(f'{ticks} ticks for this update')
+                    logger.debug('%s ticks for this update', ticks)
 
                 for _ in range(ticks):
-                    # process actions for players and enemies
-                    for player in self.players:
-                        if self.enemies:
-                            self.process_actions(entity=player)
-                        else:
-                            msg = "All enemies are dead"
-                            self.write_combat_log(msg)
-                            print(msg)
-                            self.end()
-                            return
-
-                    for enemy in self.enemies:
-                        if self.players:
-                            self.process_actions(entity=enemy)
-                        else:
-                            msg = "All players are dead"
-                            self.write_combat_log(msg)
-                            print(msg)
-                            self.end()
-                            return
-
-                    # apply buffered attack actions
-                    if self.attack_buffer:
-                        for attack in self.attack_buffer:
-                            logmsg = f'{attack[0].name} hits {attack[1].name} for {attack[0].damage} damage'
-                            self.write_combat_log(logmsg)
-                            attack[0].attack(entity=attack[1])
-
-                    # evaluate enemy health
-                    for enemy in self.enemies:
-                        if enemy.health <= 0:
-                            self.write_combat_log(f'{enemy.name} is dead')
-                            self.enemies.remove(enemy)
-
-                    # evaluate players health
-                    for idx, player in enumerate(self.players):
-                        if player.health <= 0:
-                            self.write_combat_log(f'{player.name} is dead')
-                            del self.players[idx]
-
-                    # apply buffered move actions
-                    if self.move_buffer:
-                        for move in self.move_buffer:
-                            if move[0] not in self.players and move[0] not in self.enemies:
-                                continue
-                            self.write_combat_log(f'{move[0].name} moves {move[1]}')
-                            move[0].move(distance=move[1])
-
-                    self.update_status_log()
-                    self.update_combat_log()
-                    self.attack_buffer = []
-                    self.move_buffer = []
+                    if not self._tick():
+                        return
 
                 self.last_updated = time.time()
@@ -1,8 +1,9 @@
-import random
+import hashlib
 import math
+import struct
 
 from entity import Entity
-from markov import MarkovNameGenerator
+from markov import fitted
 
 
 # Markov corpus sets
@@ -13,63 +14,73 @@ MONSTERS_CORPUS = ['Ancient Red Dragon', 'Ancalagon the Black', 'Beholder', 'Gla
 DUNGEON_CORPUS = ['Widows Mine', 'Drake Mouth Cavern', 'Ancient Shipwreck', 'Cyclops Den', 'Ruins of Orvo', 'The Whispering Crypt', 'Blighted Grotto', 'Shattered Sanctum', 'Ironfang Keep', 'Dreadmarrow Catacombs', 'Shadowed Sepulcher', 'The Howling Pit', 'Sunken Temple of Aethel', 'Gilded Necropolis', 'Wraith-Haunted Burrow', 'Obsidian Vault', 'The Crimson Oubliette', 'Frozen Bastion', 'Cursed Ossuary', 'The Weeping Mines', 'Spider-Silk Hollow', 'Forsaken Citadel', 'The Maw of Despair', 'Emerald Labyrinth', 'Ancient Archives', 'The Bone Orchard', 'Scourge-Fire Peak', 'Ghost-Light Caverns', 'Lost Aqueducts of Orix', 'The Ashen Laboratory', 'Sunless Grove', 'Twisted Spire', 'Blackwood Thicket', 'The Iron Grave', 'Sirens Cove', 'The Underhall', 'Bleakwood Manor', 'Rune-Scarred Halls', 'Vile Ichor Basin', 'The Silent Bastille', 'Wyrm-Hide Den', 'Misty Chasm', 'The Shattered Spire', 'Deadmans Reach', 'Cinder-Stone Cellars', 'The Hidden Reliquary', 'Fallen Star Crater', 'The Marrow-Pick Mine', 'Glaring Eye Outpost', 'Serpents Coil Tunnel', 'The Void-Touched Rift', 'Desolate Foundry', 'Wailing Woodshed', 'The Marble Mausoleum', 'Grim-Water Lock', 'The Salt-Crusted Tomb', 'Eldritch Excavation', 'The Gloom-Weavers Nest', 'Blood-Drenched Pit', 'The Scaled Bastion', 'Forgotten Armory', 'The Lunar Shrine', 'Brimstone Crevasse', 'The Hollowed Mountain', 'Verdant Overgrowth', 'The Ruined Cloister', 'Sulfur-Stained Caves', 'The Clockwork Maze', 'Drowned Treasury','The Shifting Sands', 'Obsidian Obelisk', 'The Frost-Bitten Hold', 'Amber Web Hive', 'The Petrified Forest', 'Sun-Scorched Ruins', 'The Shadow-Step Alley', 'Basalt Fortress', 'The Murmuring Abyss', 'Lich-Fire Spire', 'The Broken Gatehouse', 'Withered Heart Grove', 'The Stone-Singers Vault', 'Cobalt Quarry', 'The Plague-Ridden Sewers', 'Thunder-Clap Gorge', 'The Eternal Prison', 'Vanguard Outpost', 'The Mossy Warren', 'Raven-Flight Tower', 'The Deep-Core Sinkhole', 'Spectral Citadel', 'The Jagged Crest', 'Whispering Willow Glen', 'The Molten Forge', 'Sable-Stone Hold', 'The Dragon-Tail Bend', 'Mirror-Glass Palace', 'The Ancient Aviary', 'Rotting Root Catacombs', 'The Final Resting Place']
 
 
-def generate_entity(name: str, seed: object, level: int) -> Entity:
-    rand_health = random.Random()
-    rand_range = random.Random()
-    rand_speed = random.Random()
-    rand_dmg = random.Random()
+# Optional directory where fitted Markov models are persisted between processes
+MODEL_CACHE_DIR = None
 
-    rand_health.seed('health' + name + str(seed))
-    rand_range.seed('range' + name + str(seed))
-    rand_speed.seed('speed' + name + str(seed))
-    rand_dmg.seed('damage' + name + str(seed))
 
-    health = math.floor(rand_health.uniform(1, 5) * (level * 2))
-    range = math.floor(rand_range.uniform(1, 3) + (level * rand_range.uniform(0.01, 0.04)))
-    speed = math.floor(rand_speed.uniform(1, 2.5) + (level * rand_speed.uniform(0.05, 0.1)))
-    damage = math.floor(rand_dmg.uniform(1, 2) + (level / rand_dmg.uniform(2, 5)))
+STANCES = ['skirmish', 'assassin']
 
-    max_targets = 1
-    initiative = random.randint(0, 5)
-    stance = random.choice(['skirmish', 'assassin'])
+# lane of the per-entity hash each stat draws from, see stat_draws
+HEALTH, RANGE, RANGE_LEVEL, SPEED, SPEED_LEVEL, DAMAGE, DAMAGE_LEVEL, INITIATIVE, STANCE = range(9)
 
-    return Entity(name=name, attackrate=1, damage=damage, health=health, range=range, speed=speed,
-                  max_targets=max_targets, initiative=initiative, stance=stance)
 
+def stat_draws(name: str, seed: object) -> tuple:
+    """
+    Sixteen uniform [0, 1) draws for one entity, counter-style: lane i of a hash keyed by (seed, name)
 
-def generate_npcs(count: int, seed: object, level: int) -> list[Entity]:
-    genfirst = MarkovNameGenerator(order=3, seed=seed, normalize_case=True)
-    genlast = MarkovNameGenerator(order=3, seed=seed, normalize_case=True)
+    Deterministic across processes and Python versions, unlike the global random module or hash()
+    """
+    digest = hashlib.blake2b(f'{seed}\0{name}'.encode('utf-8'), digest_size=64).digest()
+    return tuple(x / 4294967296 for x in struct.unpack('<16I', digest))
 
-    genfirst.fit(FIRST_CORPUS)
-    genlast.fit(LAST_CORPUS)
-
-    firstnames = genfirst.generate_many(k=count, max_len=12, min_len=3, avoid_training=True)
-    lastnames = genlast.generate_many(k=count, max_len=12, min_len=4, avoid_training=True)
 
+def generate_entities(names: list[str], seed: object, level: int) -> list[Entity]:
+    """
+    Build entities for a batch of names, every stat is derived from (seed, name, stat) so a name always rolls the
+    same entity for a given seed and level
+    """
     entities = []
-    i = 0
 
-    while i < len(firstnames):
-        name = f'{(firstnames[i]).strip().title()} {lastnames[i].strip().title()}'
-        entities.append(generate_entity(name, seed, level))
-        i += 1
+    for name in names:
+        u = stat_draws(name, seed)
+
+        health = math.floor((1 + 4 * u[HEALTH]) * (level * 2))
+        range = math.floor((1 + 2 * u[RANGE]) + (level * (0.01 + 0.03 * u[RANGE_LEVEL])))
+        speed = math.floor((1 + 1.5 * u[SPEED]) + (level * (0.05 + 0.05 * u[SPEED_LEVEL])))
+        damage = math.floor((1 + u[DAMAGE]) + (level / (2 + 3 * u[DAMAGE_LEVEL])))
+
+        max_targets = 1
+        initiative = math.floor(u[INITIATIVE] * 6)
+        stance = STANCES[math.floor(u[STANCE] * len(STANCES))]
+
+        entities.append(Entity(name=name, attackrate=1, damage=damage, health=health, range=range, speed=speed,
+                               max_targets=max_targets, initiative=initiative, stance=stance))
 
     return entities
 
 
-def generate_monsters(count: int, seed: object, level: int) -> list[Entity]:
-    genmonsters = MarkovNameGenerator(order=3, seed=seed, normalize_case=True)
-    genmonsters.fit(MONSTERS_CORPUS)
-    names = genmonsters.generate_many(k=count, max_len=16, min_len=3, avoid_training=True)
+def generate_entity(name: str, seed: object, level: int) -> Entity:
+    return generate_entities([name], seed, level)[0]
 
-    entities = []
 
-    for name in names:
-        name = name.strip().title()
-        entities.append(generate_entity(name, seed, level))
+def generate_npcs(count: int, seed: object, level: int) -> list[Entity]:
+    genfirst = fitted(FIRST_CORPUS, order=3, seed=seed, normalize_case=True, cache_dir=MODEL_CACHE_DIR)
+    genlast = fitted(LAST_CORPUS, order=3, seed=seed, normalize_case=True, cache_dir=MODEL_CACHE_DIR)
 
-    return entities
+    firstnames = genfirst.generate_many(k=count, max_len=12, min_len=3, avoid_training=True)
+    lastnames = genlast.generate_many(k=count, max_len=12, min_len=4, avoid_training=True)
+
+    # an exhausted model hands back fewer names, only pair up what both sides produced
+    names = [f'{first.strip().title()} {last.strip().title()}' for first, last in zip(firstnames, lastnames)]
+
+    return generate_entities(names, seed, level)
+
+
+def generate_monsters(count: int, seed: object, level: int) -> list[Entity]:
+    genmonsters = fitted(MONSTERS_CORPUS, order=3, seed=seed, normalize_case=True, cache_dir=MODEL_CACHE_DIR)
+    names = genmonsters.generate_many(k=count, max_len=16, min_len=3, avoid_training=True)
+
+    return generate_entities([name.strip().title() for name in names], seed, level)
 
 
 if __name__ == '__main__':
@@ -80,8 +91,7 @@ if __name__ == '__main__':
     monsters = generate_monsters(count=count, seed=seed, level=level)
 
     for monster in monsters:
-        for k, v in monster.__dict__.items():
-            if not k.startswith('__'):
-                print(f"{k}: {v}")
+        for k, v in monster.snapshot().items():
+            print(f"{k}: {v}")
 
         print('-----------------------------------------------------------------------------------------------')
\ No newline at end of file
@@ -0,0 +1,145 @@
+from __future__ import annotations
+import asyncio
+import heapq
+import itertools
+
+from entity import Entity
+from event import Event
+
+
+class EventHost:
+    """
+    Hosts many Events in one asyncio loop, ticking each exactly when it is due
+
+    Due times sit in a heap, so the loop sleeps until the next event needs a tick instead of polling all of them.
+    Events only get a heap entry while they can make progress: ended events are dropped, events still missing a side
+    are parked until both sides have someone. An event whose tick raises is dropped too, wait_ended() raises its
+    exception, and every other event keeps ticking.
+    """
+
+    def __init__(self, tickrate: float = 1.0) -> None:
+        self.tickrate = tickrate
+        self.events = {}
+        self._heap = []
+        self._scheduled = set()
+        self._done = {}
+        self._failed = set()
+        self._ids = itertools.count()
+        self._order = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._runner = None
+
+    async def create_event(self, size: int, **kwargs) -> int:
+        """Create an Event owned by the host, kwargs are passed through to Event"""
+        event_id = next(self._ids)
+        self.events[event_id] = Event(size, **kwargs)
+        self._done[event_id] = asyncio.get_running_loop().create_future()
+        self._ensure_running()
+
+        return event_id
+
+    async def add_player(self, event_id: int, player: Entity) -> None:
+        self.events[event_id].add_player(player)
+        self._schedule(event_id)
+
+    async def add_enemy(self, event_id: int, enemy: Entity) -> None:
+        self.events[event_id].add_enemy(enemy)
+        self._schedule(event_id)
+
+    async def wait_ended(self, event_id: int) -> Event:
+        """Wait until the event has ended, returns the finished Event or raises what its tick raised"""
+        return await self._done[event_id]
+
+    def remove(self, event_id: int) -> Event | None:
+        """Stop hosting an event, its heap entry is discarded lazily"""
+        self._scheduled.discard(event_id)
+        self._failed.discard(event_id)
+        done = self._done.pop(event_id, None)
+        if done and not done.done():
+            done.cancel()
+
+        return self.events.pop(event_id, None)
+
+    def _schedule(self, event_id: int, due: float | None = None) -> None:
+        if event_id in self._scheduled:
+            return
+
+        event = self.events[event_id]
+        if not event.active or event_id in self._failed:
+            return
+
+        # a fresh event waits for both sides, otherwise the first tick would just declare a winner
+        if due is None:
+            if not (event.players and event.enemies):
+                return
+            due = asyncio.get_running_loop().time() + self.tickrate
+
+        self._scheduled.add(event_id)
+        heapq.heappush(self._heap, (due, next(self._order), event_id))
+        self._wakeup.set()
+
+    def _ensure_running(self) -> None:
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.get_running_loop().create_task(self.run())
+
+    async def run(self) -> None:
+        """Tick loop, started on the first create_event"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            due = self._heap[0][0]
+            delay = due - loop.time()
+
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, event_id = heapq.heappop(self._heap)
+            if event_id not in self._scheduled:
+                continue
+
+            self._scheduled.discard(event_id)
+            event = self.events[event_id]
+
+            try:
+                event.step(1)
+            except Exception as exc:
+                self._failed.add(event_id)
+                done = self._done[event_id]
+                if not done.done():
+                    done.set_exception(exc)
+                continue
+
+            if not event.active:
+                done = self._done[event_id]
+                if not done.done():
+                    done.set_result(event)
+                continue
+
+            # keep a fixed cadence, skipping ticks we were too late for rather than bursting to catch up
+            next_due = due + self.tickrate
+            if next_due <= loop.time():
+                next_due = loop.time() + self.tickrate
+
+            self._schedule(event_id, next_due)
+
+            # let everyone else run between ticks when many events are due at once
+            await asyncio.sleep(0)
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
@@ -0,0 +1,269 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+
+
+# combat record kinds, see CombatBuffer
+HIT, MOVE, DEATH, TEXT = range(4)
+RECORD_WIDTH = 5
+
+# Entity fields that never change once an entity is on the field, recorded once per entity
+STATIC_FIELDS = ('id', 'isplayer', 'name', 'attackrate', 'damage', 'max_health', 'range', 'speed', 'max_targets',
+                 'initiative', 'last_attack', 'stance')
+
+
+class TickLog:
+    """
+    Time-ordered ring buffer with one entry per tick
+
+    Keeps the last capacity entries (None keeps everything). Every entry gets a sequence number that keeps
+    increasing across eviction and clear(), so a reader can hold on to a cursor and ask for whatever came after it.
+    Timestamps must not decrease, which lets time range reads bisect instead of scanning.
+    """
+
+    def __init__(self, capacity: int | None = None) -> None:
+        self.capacity = capacity
+        self._next_seq = 0
+        self.clear()
+
+    def clear(self) -> None:
+        self._times = [None] * self.capacity if self.capacity else []
+        self._entries = [None] * self.capacity if self.capacity else []
+        self._head = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest retained entry"""
+        return self._next_seq - self._count
+
+    @property
+    def next_seq(self) -> int:
+        """Sequence number the next appended entry will get, a cursor that is caught up"""
+        return self._next_seq
+
+    def append(self, timestamp: float, entry) -> int:
+        seq = self._next_seq
+        self._next_seq += 1
+
+        if not self.capacity:
+            self._times.append(timestamp)
+            self._entries.append(entry)
+            self._count += 1
+            return seq
+
+        pos = (self._head + self._count) % self.capacity
+        self._times[pos] = timestamp
+        self._entries[pos] = entry
+
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self._head = (self._head + 1) % self.capacity
+
+        return seq
+
+    def _pos(self, idx: int) -> int:
+        return (self._head + idx) % self.capacity if self.capacity else idx
+
+    def time(self, idx: int) -> float:
+        return self._times[self._pos(idx)]
+
+    def entry(self, idx: int):
+        return self._entries[self._pos(idx)]
+
+    def _bisect(self, timestamp: float, fn) -> int:
+        if not self._head:
+            return fn(self._times, timestamp, 0, self._count)
+
+        # wrapped: oldest run is [head, capacity), newest run is [0, head)
+        idx = fn(self._times, timestamp, self._head, self.capacity)
+        if idx < self.capacity:
+            return idx - self._head
+
+        return (self.capacity - self._head) + fn(self._times, timestamp, 0, self._head)
+
+    def between(self, min_time: float = None, max_time: float = None) -> range:
+        """Indices of retained entries with min_time <= time <= max_time, falsy bounds are open"""
+        lo = self._bisect(min_time, bisect_left) if min_time else 0
+        hi = self._bisect(max_time, bisect_right) if max_time else self._count
+
+        return range(lo, max(lo, hi))
+
+    def since(self, cursor: int) -> tuple[range, int]:
+        """
+        Indices of entries appended at or after cursor, and the cursor to pass next time
+
+        Entries already evicted are skipped silently.
+        """
+        lo = min(max(cursor - self.first_seq, 0), self._count)
+
+        return range(lo, self._count), self._next_seq
+
+
+class StatusLog(TickLog):
+    """
+    Per-tick position and health of every entity on the field
+
+    Static stats are stored once per entity in a slot table, each tick only packs (slot, position, health) triples
+    into a single int array. Entity references are never held, so dead entities are free to be collected.
+
+    sink: optional logstore.LogSink every entry is also streamed to
+    """
+
+    def __init__(self, capacity: int | None = None, sink=None) -> None:
+        self._slots = {}
+        self._static = []
+        self.sink = sink
+        super().__init__(capacity)
+
+    def _slot(self, entity) -> int:
+        slot = self._slots.get(entity.id)
+
+        if slot is None:
+            slot = len(self._static)
+            self._slots[entity.id] = slot
+            self._static.append({k: getattr(entity, k) for k in STATIC_FIELDS})
+
+        return slot
+
+    def record(self, timestamp: float, players: list, enemies: list) -> int:
+        packed = array('q')
+
+        for entity in players:
+            packed.extend((self._slot(entity), entity.position, entity.health))
+
+        for entity in enemies:
+            packed.extend((self._slot(entity), entity.position, entity.health))
+
+        if self.sink:
+            self.sink.status(timestamp, len(players), packed, self._static)
+
+        return self.append(timestamp, (len(players), packed))
+
+    def _entity(self, slot: int, position: int, health: int) -> dict:
+        return {**self._static[slot], 'position': position, 'health': health}
+
+    def frame(self, idx: int) -> dict:
+        """Rebuild the {'time', 'players', 'enemies'} status dict of a recorded tick"""
+        nplayers, packed = self.entry(idx)
+        entities = [self._entity(*packed[i:i + 3]) for i in range(0, len(packed), 3)]
+
+        return {'time': self.time(idx), 'players': entities[:nplayers], 'enemies': entities[nplayers:]}
+
+
+class CombatBuffer:
+    """
+    Combat records of the tick in progress, packed as (tick, kind, actor id, target id, amount) into one int array
+
+    The array is allocated up front and reused every tick, it only grows when a tick writes more records than it
+    has ever held. TEXT records carry free-form messages, amount is the message's index in texts.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        self._data = array('q', bytes(8 * RECORD_WIDTH * capacity))
+        self._len = 0
+        self.texts = []
+
+    def __len__(self) -> int:
+        return self._len
+
+    def append(self, tick: int, kind: int, actor: int, target: int = -1, amount: int = 0) -> None:
+        data = self._data
+        i = self._len * RECORD_WIDTH
+
+        if i == len(data):
+            data.frombytes(bytes(8 * len(data)))
+
+        data[i] = tick
+        data[i + 1] = kind
+        data[i + 2] = actor
+        data[i + 3] = target
+        data[i + 4] = amount
+        self._len += 1
+
+    def text(self, tick: int, msg: str) -> None:
+        self.append(tick, TEXT, -1, -1, len(self.texts))
+        self.texts.append(msg)
+
+    def freeze(self) -> tuple:
+        """Copy of the records written so far, in the form CombatLog stores them"""
+        return self._data[:self._len * RECORD_WIDTH], tuple(self.texts)
+
+    def clear(self) -> None:
+        self._len = 0
+        self.texts = []
+
+
+class CombatLog(TickLog):
+    """
+    Per-tick combat records, rendered to text only when read
+
+    Entries are frozen CombatBuffers. Names are looked up by entity id in names, which the event fills in as
+    entities join, so records stay plain ints until a consumer asks for the {'time', 'logs'} dicts.
+
+    sink: optional logstore.LogSink every entry is also streamed to
+    """
+
+    def __init__(self, capacity: int | None = None, sink=None) -> None:
+        self.names = {}
+        self.sink = sink
+        super().__init__(capacity)
+
+    def record(self, timestamp: float, buffer: CombatBuffer) -> int:
+        entry = buffer.freeze()
+        if self.sink:
+            self.sink.combat(timestamp, *entry, self.names)
+
+        return self.append(timestamp, entry)
+
+    def records(self, idx: int) -> list[tuple]:
+        """(tick, kind, actor id, target id, amount) tuples of a recorded tick"""
+        packed, _ = self.entry(idx)
+        return [tuple(packed[i:i + RECORD_WIDTH]) for i in range(0, len(packed), RECORD_WIDTH)]
+
+    def message(self, kind: int, actor: int, target: int, amount: int, texts) -> str:
+        names = self.names
+
+        if kind == HIT:
+            return f'{names[actor]} hits {names[target]} for {amount} damage'
+        if kind == MOVE:
+            return f'{names[actor]} moves {amount}'
+        if kind == DEATH:
+            return f'{names[actor]} is dead'
+
+        return texts[amount]
+
+    def lines(self, timestamp: float, packed, texts) -> list[dict]:
+        return [{'time': timestamp, 'msg': self.message(*packed[i + 1:i + RECORD_WIDTH], texts)}
+                for i in range(0, len(packed), RECORD_WIDTH)]
+
+    def render(self, idx: int) -> dict:
+        """Rebuild the {'time', 'logs'} combat log dict of a recorded tick"""
+        timestamp = self.time(idx)
+        return {'time': timestamp, 'logs': self.lines(timestamp, *self.entry(idx))}
+
+    def render_pending(self, timestamp: float, buffer: CombatBuffer) -> list[dict]:
+        """Render the records of a tick that hasn't been committed yet"""
+        return self.lines(timestamp, *buffer.freeze())
+
+
+class StatusFrames(Sequence):
+    """Read-only view over a selection of StatusLog ticks, dicts are only built when a frame is accessed"""
+
+    def __init__(self, log: StatusLog, indices: range | list) -> None:
+        self._log = log
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return StatusFrames(self._log, self._indices[idx])
+
+        return self._log.frame(self._indices[idx])
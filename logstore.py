@@ -0,0 +1,358 @@
+"""
+Append-only on-disk history of an Event's combat and status logs
+
+    sink = LogSink('logs/dungeon-1', max_bytes=64 * 2**20, flush_ticks=32)
+    event = Event(100, log_retention=64, log_sink=sink)
+    ...
+    reader = sink.reader()
+    reader.read_combat_log(1000, 2000)
+
+Each stream (combat, status) is a series of files <stream>.<n>.log, a new one is started whenever the current one
+would grow past max_bytes, and only the newest keep files are kept (None keeps all). Every file starts with MAGIC and
+a version, followed by length-prefixed frames:
+
+    frame      payload length, kind, timestamp, then the payload
+    COMBAT     record count, text count, the (tick, kind, actor, target, amount) int64 records, then (length, utf-8)
+               per text
+    STATUS     player count, then the (slot, position, health) int64 triples
+    META       JSON, {"names": {id: name}} on combat files, {"static": {slot: fields}} on status files
+
+A file repeats all META it depends on before its first frame, so each file can be read, or deleted, on its own.
+"""
+from __future__ import annotations
+import json
+import mmap
+import os
+import struct
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Callable
+
+from logs import RECORD_WIDTH, CombatLog, StatusFrames
+
+
+MAGIC = b'EVLG'
+VERSION = 1
+
+FILE_HEADER = struct.Struct('<4sH')
+FRAME = struct.Struct('<IBd')
+COUNTS = struct.Struct('<II')
+LENGTH = struct.Struct('<I')
+
+# frame kinds
+COMBAT = 0
+STATUS = 1
+META = 2
+
+STREAMS = ('combat', 'status')
+
+
+def _files(directory: str, stream: str) -> list[tuple[int, str]]:
+    """(number, path) of every file of a stream in directory, oldest first"""
+    found = []
+
+    for name in os.listdir(directory) if os.path.isdir(directory) else ():
+        prefix, _, rest = name.partition('.')
+        number, _, ext = rest.partition('.')
+        if prefix == stream and ext == 'log' and number.isdigit():
+            found.append((int(number), os.path.join(directory, name)))
+
+    return sorted(found)
+
+
+def _meta(key: str, values: dict) -> bytes:
+    return json.dumps({key: values}, separators=(',', ':')).encode('utf-8')
+
+
+class _Writer:
+    """One stream's current file, its write buffer and the META already written to it"""
+
+    def __init__(self, directory: str, stream: str, max_bytes: int, keep: int | None) -> None:
+        self.directory = directory
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.buffer = bytearray()
+        self.file = None
+        self.size = 0
+        self.known = 0
+        existing = _files(directory, stream)
+        # never append to an earlier writer's file, its META numbering belongs to another event
+        self.number = existing[-1][0] + 1 if existing else 0
+
+    def _open(self) -> None:
+        path = os.path.join(self.directory, f'{self.stream}.{self.number:06d}.log')
+        self.number += 1
+        self.file = open(path, 'wb')
+        self.buffer += FILE_HEADER.pack(MAGIC, VERSION)
+        self.size = FILE_HEADER.size
+        self.known = 0
+
+        if self.keep:
+            for _, old in _files(self.directory, self.stream)[:-self.keep]:
+                os.remove(old)
+
+    def reserve(self, nbytes: int) -> bool:
+        """
+        Start a new file first if nbytes more would take this one past max_bytes, a file holds at least a frame
+
+        Returns whether it did, the new file knows no META yet.
+        """
+        if self.file is None or (self.size + nbytes > self.max_bytes and self.size > FILE_HEADER.size):
+            self.rotate()
+            return True
+        return False
+
+    def write(self, kind: int, timestamp: float, payload: bytes) -> None:
+        self.buffer += FRAME.pack(len(payload), kind, timestamp)
+        self.buffer += payload
+        self.size += FRAME.size + len(payload)
+
+    def rotate(self) -> None:
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+        self._open()
+
+    def flush(self) -> None:
+        if self.file is not None and self.buffer:
+            self.file.write(self.buffer)
+            self.file.flush()
+            self.buffer.clear()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+class LogSink:
+    """
+    Streams every recorded tick of an event's combat and status logs to disk
+
+    Frames are packed into memory and written out every flush_ticks ticks, on flush() and when the event ends. Pair
+    it with a small log_retention to keep a long event's history on disk instead of in memory.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 2**20, flush_ticks: int = 16,
+                 keep: int | None = None) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.flush_ticks = flush_ticks
+        self.ticks = 0
+        self._combat = _Writer(directory, 'combat', max_bytes, keep)
+        self._status = _Writer(directory, 'status', max_bytes, keep)
+
+    def combat(self, timestamp: float, packed: array, texts: tuple, names: dict) -> None:
+        """Append a CombatLog entry, the event records combat last so this also counts the tick"""
+        writer = self._combat
+        encoded = [text.encode('utf-8') for text in texts]
+        payload = b''.join([COUNTS.pack(len(packed) // RECORD_WIDTH, len(texts)), packed.tobytes()]
+                           + [LENGTH.pack(len(raw)) + raw for raw in encoded])
+
+        self._frame(writer, COMBAT, timestamp, payload, 'names', lambda start: dict(list(names.items())[start:]),
+                    len(names))
+
+        self.ticks += 1
+        if self.ticks % self.flush_ticks == 0:
+            self.flush()
+
+    def status(self, timestamp: float, nplayers: int, packed: array, static: list) -> None:
+        """Append a StatusLog entry, static is the log's slot table"""
+        writer = self._status
+        payload = LENGTH.pack(nplayers) + packed.tobytes()
+
+        self._frame(writer, STATUS, timestamp, payload, 'static',
+                    lambda start: {slot: static[slot] for slot in range(start, len(static))}, len(static))
+
+    def _frame(self, writer: _Writer, kind: int, timestamp: float, payload: bytes, key: str,
+               table: Callable[[int], dict], known: int) -> None:
+        """
+        Write a frame behind the META its file is missing, table(start) gives the entries from start to known
+
+        Room is reserved for both, so the META never tips a file past max_bytes on its own. After a rotation the new
+        file gets the whole table.
+        """
+        meta = _meta(key, table(writer.known)) if writer.known < known else b''
+        if writer.reserve(FRAME.size + len(payload) + (FRAME.size + len(meta) if meta else 0)) and known:
+            meta = _meta(key, table(0))
+
+        if meta:
+            writer.write(META, timestamp, meta)
+            writer.known = known
+        writer.write(kind, timestamp, payload)
+
+    def flush(self) -> None:
+        self._combat.flush()
+        self._status.flush()
+
+    def close(self) -> None:
+        self._combat.close()
+        self._status.close()
+
+    def __enter__(self) -> LogSink:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def reader(self) -> LogReader:
+        """Flush and open a reader over everything written so far"""
+        self.flush()
+        return LogReader(self.directory)
+
+
+class _Mapped:
+    """Memory map of one log file and the index of its frames, extended as the file grows"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.map = None
+        self.end = FILE_HEADER.size
+        self.times = array('d')
+        self.offsets = array('q')
+        self.names = {}
+        self.static = []
+
+    def refresh(self) -> None:
+        """Index frames appended since the last refresh, a frame still being written is left for the next one"""
+        size = os.path.getsize(self.path)
+        if size <= self.end or (self.map is not None and size == len(self.map)):
+            return
+
+        if self.map is not None:
+            self.map.close()
+        with open(self.path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version = FILE_HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError(f'{self.path} is not an event log')
+        if version != VERSION:
+            raise ValueError(f'{self.path} has log version {version}, expected {VERSION}')
+
+        data, offset = self.map, self.end
+        while offset + FRAME.size <= size:
+            length, kind, timestamp = FRAME.unpack_from(data, offset)
+            end = offset + FRAME.size + length
+            if end > size:
+                break
+
+            if kind == META:
+                meta = json.loads(data[offset + FRAME.size:end])
+                self.names.update((int(eid), name) for eid, name in meta.get('names', {}).items())
+                self.static += meta.get('static', {}).values()
+            else:
+                self.times.append(timestamp)
+                self.offsets.append(offset)
+
+            offset = end
+
+        self.end = offset
+
+    def payload(self, offset: int) -> tuple[float, int, int]:
+        """Timestamp of the frame at offset, and where its payload starts and ends"""
+        length, _, timestamp = FRAME.unpack_from(self.map, offset)
+        return timestamp, offset + FRAME.size, offset + FRAME.size + length
+
+    def close(self) -> None:
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+class LogReader:
+    """
+    Time range queries over the files a LogSink wrote, shaped like Event.read_combat_log and read_status_log
+
+    Files are memory-mapped, only frame headers are read to index them and a frame's payload is decoded when it is
+    part of a result. Files a live sink is still writing are picked up again on every query.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._mapped = {stream: {} for stream in STREAMS}
+        # renders records with the names of whichever file they come from
+        self._renderer = CombatLog()
+
+    def _stream(self, stream: str) -> list[_Mapped]:
+        mapped = self._mapped[stream]
+        paths = [path for _, path in _files(self.directory, stream)]
+
+        for path in set(mapped).difference(paths):
+            mapped.pop(path).close()
+
+        files = []
+        for path in paths:
+            m = mapped.get(path)
+            if m is None:
+                m = mapped[path] = _Mapped(path)
+            m.refresh()
+            files.append(m)
+
+        return files
+
+    def _between(self, stream: str, min_time: float = None, max_time: float = None) -> list[tuple[_Mapped, int]]:
+        """(file, offset) of every frame with min_time <= time <= max_time, falsy bounds are open"""
+        found = []
+
+        for m in self._stream(stream):
+            lo = bisect_left(m.times, min_time) if min_time else 0
+            hi = bisect_right(m.times, max_time) if max_time else len(m.times)
+            found += [(m, m.offsets[i]) for i in range(lo, hi)]
+
+        return found
+
+    def read_combat_log(self, min_time: float = None, max_time: float = None) -> list:
+        return [self.combat(location) for location in self._between('combat', min_time, max_time)]
+
+    def read_status_log(self, min_time: float = None, max_time: float = None) -> StatusFrames:
+        return StatusFrames(self, self._between('status', min_time, max_time))
+
+    def combat(self, location: tuple[_Mapped, int]) -> dict:
+        """Rebuild the {'time', 'logs'} combat log dict of a stored tick"""
+        m, offset = location
+        timestamp, offset, _ = m.payload(offset)
+        nrecords, ntexts = COUNTS.unpack_from(m.map, offset)
+        offset += COUNTS.size
+
+        packed = array('q')
+        packed.frombytes(m.map[offset:offset + nrecords * RECORD_WIDTH * packed.itemsize])
+        offset += nrecords * RECORD_WIDTH * packed.itemsize
+
+        texts = []
+        for _ in range(ntexts):
+            (length,) = LENGTH.unpack_from(m.map, offset)
+            offset += LENGTH.size
+            texts.append(m.map[offset:offset + length].decode('utf-8'))
+            offset += length
+
+        self._renderer.names = m.names
+        return {'time': timestamp, 'logs': self._renderer.lines(timestamp, packed, texts)}
+
+    def frame(self, location: tuple[_Mapped, int]) -> dict:
+        """Rebuild the {'time', 'players', 'enemies'} status dict of a stored tick"""
+        m, offset = location
+        timestamp, offset, end = m.payload(offset)
+        (nplayers,) = LENGTH.unpack_from(m.map, offset)
+
+        packed = array('q')
+        packed.frombytes(m.map[offset + LENGTH.size:end])
+        entities = [{**m.static[packed[i]], 'position': packed[i + 1], 'health': packed[i + 2]}
+                    for i in range(0, len(packed), 3)]
+
+        return {'time': timestamp, 'players': entities[:nplayers], 'enemies': entities[nplayers:]}
+
+    def close(self) -> None:
+        for mapped in self._mapped.values():
+            for m in mapped.values():
+                m.close()
+            mapped.clear()
+
+    def __enter__(self) -> LogReader:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
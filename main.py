@@ -1,108 +1,70 @@
 import time
-import random
-import os
-import copy
 import math
 
-from entity import Entity
 from event import Event
 from generators import generate_npcs, generate_monsters
+from render import TerminalRenderer, battlefield
+from templates import CLASSES
 
-from itertools import zip_longest
+from collections import Counter
+from itertools import chain, zip_longest
+
+
+PLAYER_GLYPHS = {'PikemanP': '⟶', 'BerserkerP': '🪓', 'ArcherP': '🏹', 'SwordmanP': '🤺', 'MageP': '🧙',
+                 'CavalryP': '🏇'}
+ENEMY_GLYPHS = {'Pikeman': '⟵', 'Berserker': '🪓', 'Archer': '🏹', 'Swordman': '🤺', 'Mage': '🧛',
+                'Cavalry': '🏇'}
 
 
 def big_random_battle():
-    os.system('cls' if os.name == 'nt' else 'clear')
     event = Event(size=100, debug=False)
     teamsize = 50
 
-    classes = [
-        Entity(name='Pikeman', attackrate=1, damage=1, health=15, range=2, speed=1, max_targets=2, stance='skirmish',
-               initiative=5),
-        Entity(name='Berserker', attackrate=1, damage=5, health=10, range=1, speed=4, stance='skirmish', initiative=10),
-        Entity(name='Archer', attackrate=1, damage=1, health=5, range=4, speed=3, stance='skirmish'),
-        Entity(name='Swordman', attackrate=1, damage=2, health=20, range=1, speed=2, stance='skirmish', initiative=5),
-        Entity(name='Mage', attackrate=1, damage=1, health=5, range=3, speed=2, stance='skirmish', max_targets=3),
-        Entity(name='Cavalry', attackrate=1, damage=3, health=15, range=2, speed=8, stance='assassin', max_targets=2),
-    ]
-
-    for _ in range(teamsize):
-        x = copy.deepcopy(classes[random.randint(0, len(classes) - 1)])
-        event.add_player(x)
-
-    for _ in range(teamsize):
-        x = copy.deepcopy(classes[random.randint(0, len(classes) - 1)])
-        event.add_enemy(x)
-
-    while True:
-        bfs = []
-        for _ in range(min(teamsize, 50)):
-            bfs.append([' '] * event.size)
-
-        for player in event.players:
-            for battlefield in bfs:
-                if battlefield[player.position] == ' ':
-                    if player.name == 'PikemanP':
-                        battlefield[player.position] = '⟶'
-                    if player.name == 'BerserkerP':
-                        battlefield[player.position] = '🪓'
-                    if player.name == 'ArcherP':
-                        battlefield[player.position] = '🏹'
-                    if player.name == 'SwordmanP':
-                        battlefield[player.position] = '🤺'
-                    if player.name == 'MageP':
-                        battlefield[player.position] = '🧙'
-                    if player.name == 'CavalryP':
-                        battlefield[player.position] = '🏇'
-                    break
-
-        for enemy in event.enemies:
-            for battlefield in bfs:
-                if battlefield[enemy.position] == ' ':
-                    if enemy.name == 'Pikeman':
-                        battlefield[enemy.position] = '⟵'
-                    if enemy.name == 'Berserker':
-                        battlefield[enemy.position] = '🪓'
-                    if enemy.name == 'Archer':
-                        battlefield[enemy.position] = '🏹'
-                    if enemy.name == 'Swordman':
-                        battlefield[enemy.position] = '🤺'
-                    if enemy.name == 'Mage':
-                        battlefield[enemy.position] = '🧛'
-                    if enemy.name == 'Cavalry':
-                        battlefield[enemy.position] = '🏇'
-                    break
-
-        i = len(bfs) - 1
-        while i >= 0:
-            if i % 2 == 0:
-                print(''.join(bfs[i]))
-            i -= 1
-
-        i = 0
-        while i < len(bfs):
-            if i % 2 == 1:
-                print(''.join(bfs[i]))
-            i += 1
-
-        time.sleep(1)
-        os.system('cls' if os.name == 'nt' else 'clear')
-
-        if event.active:
-            event.update()
-        else:
-            break
+    # draw every class first, then put each one on the field in a single spawn
+    for team in ('players', 'enemies'):
+        counts = Counter(event.generation_rng.randint(0, len(CLASSES) - 1) for _ in range(teamsize))
+        for i, template in enumerate(CLASSES):
+            if counts[i]:
+                event.spawn(template, counts[i], team)
+
+    with TerminalRenderer() as renderer:
+        while True:
+            entities = chain(
+                ((player.position, PLAYER_GLYPHS.get(player.name, ' ')) for player in event.players),
+                ((enemy.position, ENEMY_GLYPHS.get(enemy.name, ' ')) for enemy in event.enemies))
+            renderer.draw(battlefield(entities, event.size, min(teamsize, 50)))
+
+            time.sleep(1)
+
+            if event.active:
+                event.update()
+            else:
+                break
+
+    print_outcome(event)
+
+
+def print_outcome(event: Event) -> None:
+    """The event logs how it ended, show it once the renderer gave the terminal back"""
+    for log in event.read_combat_log_buffer():
+        print(log['msg'])
+
+
+def health_bar(entity: dict) -> str:
+    filled = math.ceil((entity['health'] / entity['max_health']) * 10)
+    return '=' * filled + ' ' * (10 - filled)
 
 
 def procgen_battle():
-    os.system('cls' if os.name == 'nt' else 'clear')
-    event = Event(size=100, debug=False)
     teamsize = 10
     level = 50
 
     seed = input(f'''Input a seed value
     >''')
 
+    # same seed, same roster and the same battle
+    event = Event(size=100, debug=False, seed=seed)
+
     for npc in generate_npcs(count=teamsize, seed=seed, level=level):
         event.add_player(npc)
 
@@ -111,82 +73,54 @@ def procgen_battle():
 
     event.update_status_log()
     event.update_combat_log()
-    looptime = time.time()
-
-    while True:
-        bfs = []
-        combat_logs = event.read_combat_log(min_time=looptime)
-        event_status = event.read_status_log(min_time=looptime)
-
-        for status, combat in zip(event_status, combat_logs):
-            for _ in range(min(teamsize, 50)):
-                bfs.append([' '] * event.size)
-
-            status_bars = []
-            for player, enemy in zip_longest(status['players'], status['enemies']):
-                playerlen = 0
-                enemylen = 0
-                playerstats = ''
-                enemystats = ''
-
-                if player:
-                    playerstats = (f" [{''.join(['='] * math.ceil((player['health'] / player['max_health']) * 10))
-                                       + ''.join([' '] * (10 - math.ceil((player['health'] / player['max_health'])
-                                                                         * 10)))}]"
-                                   f" {player['name']} D{player['damage']} S{player['speed']} R{player['range']}")
-                    playerlen = len(playerstats)
-
-                if enemy:
-                    enemystats = (f"{enemy['name']}"
-                                 f" D{enemy['damage']}"
-                                 f" S{enemy['speed']}"
-                                 f" R{enemy['range']}"
-                                 f" [{''.join(['='] * math.ceil((enemy['health'] / enemy['max_health']) * 10))
-                                      + ''.join([' '] * (10 - math.ceil((enemy['health'] / enemy['max_health'])
-                                                                        * 10)))}] ")
-                    enemylen = len(enemystats)
-
-                padding = event.size - (playerlen + enemylen)
-                status_bars.append(f'{playerstats}{''.join([' '] * padding)}{enemystats}')
-
-                for battlefield in bfs:
+    combat_cursor = 0
+    status_cursor = 0
+
+    with TerminalRenderer() as renderer:
+        while True:
+            combat_logs, combat_cursor = event.read_combat_log_since(combat_cursor)
+            event_status, status_cursor = event.read_status_log_since(status_cursor)
+
+            for status, combat in zip(event_status, combat_logs):
+                entities = []
+                status_bars = []
+                for player, enemy in zip_longest(status['players'], status['enemies']):
+                    playerlen = 0
+                    enemylen = 0
+                    playerstats = ''
+                    enemystats = ''
+
                     if player:
-                        if battlefield[player['position']] == ' ':
-                            battlefield[player['position']] = player['name'][0]
-                            break
+                        playerstats = (f" [{health_bar(player)}]"
+                                       f" {player['name']} D{player['damage']} S{player['speed']} R{player['range']}")
+                        playerlen = len(playerstats)
+                        entities.append((player['position'], player['name'][0]))
 
-                for battlefield in bfs:
                     if enemy:
-                        if battlefield[enemy['position']] == ' ':
-                            battlefield[enemy['position']] = enemy['name'][0].lower()
-                            break
-
-            i = len(bfs) - 1
-            while i >= 0:
-                if i % 2 == 0:
-                    print(''.join(bfs[i]))
-                i -= 1
-
-            i = 0
-            while i < len(bfs):
-                if i % 2 == 1:
-                    print(''.join(bfs[i]))
-                i += 1
-
-            for bar in status_bars:
-                print(bar)
-
-            for log in combat['logs']:
-                print(log['msg'])
-
-            looptime = time.time()
-            time.sleep(1)
-            os.system('cls' if os.name == 'nt' else 'clear')
-
-        if event.active:
-            event.update()
-        else:
-            break
+                        enemystats = (f"{enemy['name']}"
+                                      f" D{enemy['damage']}"
+                                      f" S{enemy['speed']}"
+                                      f" R{enemy['range']}"
+                                      f" [{health_bar(enemy)}] ")
+                        enemylen = len(enemystats)
+                        entities.append((enemy['position'], enemy['name'][0].lower()))
+
+                    padding = event.size - (playerlen + enemylen)
+                    status_bars.append(f'{playerstats}{' ' * padding}{enemystats}')
+
+                lines = battlefield(entities, event.size, min(teamsize, 50))
+                lines += status_bars
+                lines += [log['msg'] for log in combat['logs']]
+                renderer.draw(lines)
+
+                time.sleep(1)
+
+            if event.active:
+                event.update()
+            else:
+                break
+
+    print_outcome(event)
 
 
 if __name__ == '__main__':
@@ -1,6 +1,10 @@
-from collections import Counter, defaultdict
+from collections import Counter, OrderedDict, defaultdict
 from dataclasses import dataclass
+from bisect import bisect_right
+from itertools import accumulate, islice
 import hashlib
+import json
+import os
 import random
 from typing import Dict, List, Tuple, Iterable, Optional, Set
 
@@ -8,12 +12,20 @@ from typing import Dict, List, Tuple, Iterable, Optional, Set
 _START = "\u0002"
 _END = "\u0003"
 
+# Bump when the on-disk model layout changes, older files are refitted
+_FORMAT_VERSION = 1
+
+# count_outputs stops counting here, far beyond any batch we would ask for
+_COUNT_CAP = 10 ** 9
+
 @dataclass
 class ModelEntry:
     """Precomputed sampling tables for a single prefix."""
     symbols: List[str]       # Possible next chars
     weights: List[int]       # Corresponding counts (weights)
     total: int               # Total weight for quick checks
+    cum_weights: List[int]   # Running totals of weights, what random.choices would rebuild per call
+    next_states: List[int]   # State index reached after emitting each symbol, -1 for end/unseen
 
 
 class MarkovNameGenerator:
@@ -44,6 +56,14 @@ class MarkovNameGenerator:
 
         # Keep the training set for de-duplication under avoid_training=True
         self._training_words: Set[str] = set()
+        # Same words run through _prepare_word, for O(1) rejection of candidates
+        self._training_prepared: Set[str] = set()
+
+        # Compiled form of _model: entries indexed by state id, prefixes resolved to ids ahead of time
+        self._states: List[ModelEntry] = []
+        self._start_state: int = -1
+        # count_outputs results per (max_len, min_len, avoid_training)
+        self._space_cache: Dict[Tuple[int, int, bool], int] = {}
 
     @staticmethod
     def _mix_seed(seed: Optional[object]) -> Optional[int]:
@@ -67,13 +87,17 @@ class MarkovNameGenerator:
         Train the model from a list/iterable of discrete words.
         """
         counts: Dict[Tuple[str, ...], Counter] = defaultdict(Counter)
-        self._training_words.clear()
+        # Rebind rather than clear, clones may share the previous tables
+        self._training_words = set()
+        self._training_prepared = set()
+        self._space_cache = {}
 
         for raw in words:
             if not raw:
                 continue
             self._training_words.add(raw)
             w = self._prepare_word(raw, self.normalize_case)
+            self._training_prepared.add(w)
 
             # Pad with start tokens and end token: e.g., for order=3: ^ ^ w $
             padded = (_START * (self.order - 1)) + w + _END
@@ -86,13 +110,15 @@ class MarkovNameGenerator:
                 counts[prefix][next_char] += 1
 
         # Precompute sampling tables for efficiency and determinism
-        self._model.clear()
+        self._model = {}
         for prefix, counter in counts.items():
             # Sort symbols for reproducibility across Python runs
             symbols = sorted(counter.keys())
             weights = [counter[s] for s in symbols]
             total = sum(weights)
-            self._model[prefix] = ModelEntry(symbols, weights, total)
+            self._model[prefix] = ModelEntry(symbols, weights, total, list(accumulate(weights)), [])
+
+        self._compile()
 
         # Basic sanity: ensure we can start generation
         start_prefix = tuple(_START for _ in range(self.order - 1))
@@ -102,16 +128,152 @@ class MarkovNameGenerator:
                 "Ensure the input contains at least one non-empty word."
             )
 
-    def _sample_next(self, prefix: Tuple[str, ...]) -> Optional[str]:
+    def reseed(self, seed: Optional[object]) -> None:
+        """Restart the RNG as if the generator had been created with this seed."""
+        self.rng = random.Random(self._mix_seed(seed))
+
+    def clone(self, seed: Optional[object] = None) -> "MarkovNameGenerator":
+        """
+        New generator sharing this one's fitted tables, with its own RNG.
+        Tables are never mutated after fit, so sharing them is safe.
         """
-        Sample the next character given a prefix using the model.
-        Returns None if the prefix is unseen (should be rare).
+        other = MarkovNameGenerator(order=self.order, seed=seed, normalize_case=self.normalize_case)
+        other._model = self._model
+        other._training_words = self._training_words
+        other._training_prepared = self._training_prepared
+        other._states = self._states
+        other._start_state = self._start_state
+        other._space_cache = self._space_cache
+        return other
+
+    def save(self, path: str) -> None:
         """
-        entry = self._model.get(prefix)
-        if not entry or entry.total == 0:
+        Write the fitted model as compact JSON: prefix, symbols and counts per state.
+        Loading it skips n-gram counting entirely.
+        """
+        data = {
+            "version": _FORMAT_VERSION,
+            "order": self.order,
+            "normalize_case": self.normalize_case,
+            "training": sorted(self._training_words),
+            "states": [["".join(prefix), "".join(entry.symbols), entry.weights]
+                       for prefix, entry in self._model.items()],
+        }
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, seed: Optional[object] = None) -> "MarkovNameGenerator":
+        """Read a model written by save()."""
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        if data.get("version") != _FORMAT_VERSION:
+            raise ValueError(f"unsupported model format version {data.get('version')!r} in {path}")
+
+        gen = cls(order=data["order"], seed=seed, normalize_case=data["normalize_case"])
+        gen._training_words = set(data["training"])
+        gen._training_prepared = {cls._prepare_word(w, gen.normalize_case) for w in gen._training_words}
+        gen._model = {
+            tuple(prefix): ModelEntry(list(symbols), weights, sum(weights), list(accumulate(weights)), [])
+            for prefix, symbols, weights in data["states"]
+        }
+        gen._compile()
+        return gen
+
+    def _compile(self) -> None:
+        """Number the prefixes and resolve every transition to the state it leads to"""
+        state_ids = {prefix: i for i, prefix in enumerate(self._model)}
+        self._states = list(self._model.values())
+
+        for prefix, entry in self._model.items():
+            entry.next_states = [
+                -1 if sym == _END else state_ids.get((*prefix[1:], sym), -1)
+                for sym in entry.symbols
+            ]
+
+        start_prefix = tuple(_START for _ in range(self.order - 1))
+        self._start_state = state_ids.get(start_prefix, -1)
+
+    def _walk(self, max_len: int) -> str:
+        """One pass through the chain from the start state, at most max_len characters."""
+        states = self._states
+        rand = self.rng.random
+        state = self._start_state
+        out_chars: List[str] = []
+
+        # Sample until end token or max_len reached, walking precompiled states
+        while len(out_chars) < max_len and state >= 0:
+            entry = states[state]
+            idx = bisect_right(entry.cum_weights, rand() * entry.total, 0, len(entry.symbols) - 1)
+            nxt = entry.symbols[idx]
+            if nxt == _END:
+                break
+            out_chars.append(nxt)
+            # Slide the prefix window forward, -1 if the model lacks the new prefix
+            state = entry.next_states[idx]
+
+        return "".join(out_chars)
+
+    def _accept(self, candidate: str, min_len: int, avoid_training: bool) -> Optional[str]:
+        """Apply length and training-word constraints, returns the presentable name or None."""
+        if len(candidate) < min_len:
             return None
-        # Deterministic RNG thanks to self.rng
-        return self.rng.choices(entry.symbols, weights=entry.weights, k=1)[0]
+        if avoid_training:
+            # Compare with training words normalized the same way they were trained
+            if self._prepare_word(candidate, self.normalize_case) in self._training_prepared:
+                return None
+
+        # Capitalize nicely if we normalized case during training
+        if self.normalize_case and candidate:
+            candidate = candidate[0].upper() + candidate[1:]
+
+        return candidate
+
+    def count_outputs(self, max_len: int, min_len: int = 1, avoid_training: bool = False) -> int:
+        """
+        Number of distinct names generate() can ever return under these constraints.
+
+        Every output string corresponds to exactly one path through the chain, so this
+        counts paths by length. Capped at _COUNT_CAP, past that saturation is moot.
+        """
+        key = (max_len, min_len, avoid_training)
+        if key in self._space_cache:
+            return self._space_cache[key]
+
+        total = 0
+        if self._start_state < 0:
+            total = 1 if min_len <= 0 else 0
+        else:
+            ways = {self._start_state: 1}
+            for length in range(max_len + 1):
+                if length == max_len:
+                    total += sum(ways.values())
+                    break
+                if length >= min_len:
+                    total += sum(n for state, n in ways.items() if _END in self._states[state].symbols)
+                step: Dict[int, int] = defaultdict(int)
+                for state, n in ways.items():
+                    entry = self._states[state]
+                    for sym, nxt in zip(entry.symbols, entry.next_states):
+                        if sym == _END:
+                            continue
+                        if nxt < 0:
+                            # dead end, the walk stops with this character
+                            total += n if length + 1 >= min_len else 0
+                        else:
+                            step[nxt] += n
+                ways = step
+                if not ways or total >= _COUNT_CAP:
+                    break
+
+        if avoid_training:
+            total -= sum(1 for w in self._training_prepared if min_len <= len(w) <= max_len)
+
+        total = max(0, min(total, _COUNT_CAP))
+        self._space_cache[key] = total
+        return total
 
     def generate(
         self,
@@ -128,73 +290,163 @@ class MarkovNameGenerator:
         - avoid_training: avoid returning any exact training word.
         - max_attempts: attempts before giving up if avoid_training is True.
         """
-        start_prefix = tuple(_START for _ in range(self.order - 1))
-
         for _ in range(max_attempts):
-            prefix = start_prefix
-            out_chars: List[str] = []
-
-            # Sample until end token or max_len reached
-            while len(out_chars) < max_len:
-                nxt = self._sample_next(prefix)
-                if nxt is None:
-                    # Fallback: terminate early if model lacks this prefix
-                    break
-                if nxt == _END:
-                    break
-                out_chars.append(nxt)
-                # Slide the prefix window forward
-                prefix = (*prefix[1:], nxt)
-
-            # Enforce length constraints and avoid training words if requested
-            candidate = "".join(out_chars)
-            if len(candidate) < min_len:
-                continue
-            if avoid_training:
-                # Compare with normalized training words if normalize_case=True
-                comp = candidate if not self.normalize_case else candidate.lower()
-                # If training words were not normalized, compare raw data
-                # but we trained on normalized, so check case-insensitive match
-                if any(self._prepare_word(w, self.normalize_case) == comp for w in self._training_words):
-                    continue
+            candidate = self._accept(self._walk(max_len), min_len, avoid_training)
+            if candidate is not None:
+                return candidate
 
-            # Capitalize nicely if we normalized case during training
-            if self.normalize_case and candidate:
-                candidate = candidate[0].upper() + candidate[1:]
+        return None  # Could not produce a valid candidate under constraints
 
-            return candidate
+    def iter_names(
+        self,
+        max_len: int = 30,
+        min_len: int = 1,
+        avoid_training: bool = True,
+        unique: bool = True,
+        max_attempts: Optional[int] = None,
+        seen: Optional[Set[str]] = None,
+    ) -> "NameStream":
+        """
+        Stream names lazily.
 
-        return None  # Could not produce a valid candidate under constraints
+        - unique: skip names already in seen, and add new ones to it.
+        - max_attempts: total walks through the chain before giving up, None for no limit.
+        - seen: dedup set to share between calls, e.g. across batches of one spawn.
+        The stream ends early once every reachable name is in seen.
+        """
+        return NameStream(self, max_len, min_len, avoid_training, unique, max_attempts,
+                          seen if seen is not None else set())
 
     def generate_many(
         self,
         k: int,
         unique: bool = True,
+        max_attempts: Optional[int] = None,
+        seen: Optional[Set[str]] = None,
         **kwargs,
-    ) -> List[str]:
+    ) -> "NameBatch":
         """
         Generate multiple names/words.
 
         - k: number of items to produce.
         - unique: if True, deduplicate generated outputs.
-        - kwargs: forwarded to `generate` (e.g., max_len, min_len, avoid_training).
+        - max_attempts: total walks allowed, defaults to 100 per requested name.
+        - seen: dedup set shared across batches, updated in place.
+        - kwargs: forwarded to `iter_names` (e.g., max_len, min_len, avoid_training).
+        Returns a list that also carries attempts used and whether the model ran out of names.
         """
-        results: List[str] = []
-        seen: Set[str] = set()
-        attempts = 0
-        target = k
-
-        while len(results) < target and attempts < k * 50:
-            attempts += 1
-            item = self.generate(**kwargs)
+        stream = self.iter_names(unique=unique, max_attempts=k * 100 if max_attempts is None else max_attempts,
+                                 seen=seen, **kwargs)
+        names = list(islice(stream, k))
+        return NameBatch(names, attempts=stream.attempts, exhausted=stream.exhausted)
+
+
+class NameStream:
+    """Iterator over names from a MarkovNameGenerator, counting the walks it spends."""
+
+    def __init__(self, gen: MarkovNameGenerator, max_len: int, min_len: int, avoid_training: bool,
+                 unique: bool, max_attempts: Optional[int], seen: Set[str]):
+        self.gen = gen
+        self.max_len = max_len
+        self.min_len = min_len
+        self.avoid_training = avoid_training
+        self.unique = unique
+        self.max_attempts = max_attempts
+        self.seen = seen
+        self.attempts = 0
+        self.exhausted = False
+        self._space = gen.count_outputs(max_len, min_len, avoid_training)
+
+    def __iter__(self) -> "NameStream":
+        return self
+
+    def __next__(self) -> str:
+        gen = self.gen
+
+        while self.max_attempts is None or self.attempts < self.max_attempts:
+            # Saturated: nothing new can come out of the model
+            if not self._space or (self.unique and len(self.seen) >= self._space):
+                self.exhausted = True
+                break
+
+            self.attempts += 1
+            item = gen._accept(gen._walk(self.max_len), self.min_len, self.avoid_training)
             if item is None:
                 continue
-            if unique:
-                if item in seen:
+            if self.unique:
+                if item in self.seen:
                     continue
-                seen.add(item)
-            results.append(item)
-        return results
+                self.seen.add(item)
+            return item
+
+        raise StopIteration
+
+
+class NameBatch(list):
+    """List of names plus how they were obtained."""
+
+    def __init__(self, names: Iterable[str], attempts: int = 0, exhausted: bool = False):
+        super().__init__(names)
+        self.attempts = attempts
+        self.exhausted = exhausted
+
+
+# In-process LRU of fitted generators, keyed by (corpus digest, order, normalize_case)
+CACHE_SIZE = 32
+_cache: "OrderedDict[Tuple[str, int, bool], MarkovNameGenerator]" = OrderedDict()
+
+
+def corpus_digest(words: Iterable[str]) -> str:
+    """Stable digest of a corpus, order sensitive like fit() itself."""
+    h = hashlib.sha256()
+    for w in words:
+        h.update(w.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def fitted(
+    words: Iterable[str],
+    order: int = 2,
+    seed: Optional[object] = None,
+    normalize_case: bool = True,
+    cache_dir: Optional[str] = None,
+) -> MarkovNameGenerator:
+    """
+    Generator for a corpus, fitting it at most once per process.
+
+    - cache_dir: if given, fitted models are also saved there and loaded back
+      by later processes instead of being refitted.
+    Returns a fresh clone seeded with seed, the cached tables are shared.
+    """
+    words = list(words)
+    key = (corpus_digest(words), order, normalize_case)
+    model = _cache.get(key)
+
+    if model is None:
+        path = None
+        if cache_dir:
+            path = os.path.join(cache_dir, f"{key[0][:32]}-o{order}-{'n' if normalize_case else 'c'}.json")
+            if os.path.exists(path):
+                try:
+                    model = MarkovNameGenerator.load(path)
+                except (OSError, ValueError, KeyError):
+                    model = None
+
+        if model is None:
+            model = MarkovNameGenerator(order=order, normalize_case=normalize_case)
+            model.fit(words)
+            if path:
+                os.makedirs(cache_dir, exist_ok=True)
+                model.save(path)
+
+        _cache[key] = model
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+
+    return model.clone(seed)
 
 
 if __name__ == "__main__":
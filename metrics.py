@@ -0,0 +1,108 @@
+from __future__ import annotations
+import time
+
+from typing import Callable
+
+
+# tick phases in the order they run, see Event._tick
+PHASES = ('targeting', 'actions', 'attacks', 'culling', 'moves', 'logs')
+COUNTS = ('attacks', 'moves', 'deaths', 'log_lines')
+
+# histogram bucket i holds durations below 2**i microseconds, the last one everything slower (~4s and up)
+BUCKETS = 23
+
+
+def _bucket(seconds: float) -> int:
+    return min(int(seconds * 1e6).bit_length(), BUCKETS - 1)
+
+
+class TickProfiler:
+    """
+    Per-phase timings and per-tick counters for one Event
+
+    The event calls begin() at the start of a tick, mark(phase) at the end of every phase and end() once the tick is
+    done. Time spent inside a phase that belongs to another one (targeting happens inside actions) is reported with
+    add() and taken out of the enclosing phase's mark.
+
+    Every finished tick is folded into cumulative totals and log2 microsecond histograms, and handed to sink as a
+    plain dict if one is set.
+    """
+
+    def __init__(self, sink: Callable[[dict], None] | None = None) -> None:
+        self.sink = sink
+        self.reset()
+
+    def reset(self) -> None:
+        self.ticks = 0
+        self.total = {phase: 0.0 for phase in PHASES + ('tick',)}
+        self.histogram = {phase: [0] * BUCKETS for phase in PHASES + ('tick',)}
+        self.counts = {name: 0 for name in COUNTS}
+        self.last = None
+        self._start = self._last = 0.0
+        self._nested = 0.0
+        self._phases = {}
+        self._counts = {}
+
+    def begin(self) -> None:
+        self._start = self._last = time.perf_counter()
+        self._nested = 0.0
+        self._phases = dict.fromkeys(PHASES, 0.0)
+        self._counts = dict.fromkeys(COUNTS, 0)
+
+    def mark(self, phase: str) -> None:
+        """Attribute the time since the previous mark to phase"""
+        now = time.perf_counter()
+        self._phases[phase] += now - self._last - self._nested
+        self._last = now
+        self._nested = 0.0
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Attribute time measured inside the running phase to another phase"""
+        self._phases[phase] += seconds
+        self._nested += seconds
+
+    def count(self, name: str, n: int) -> None:
+        self._counts[name] += n
+
+    def end(self, event) -> dict:
+        elapsed = time.perf_counter() - self._start
+        self.ticks += 1
+
+        for phase, seconds in self._phases.items():
+            self.total[phase] += seconds
+            self.histogram[phase][_bucket(seconds)] += 1
+
+        self.total['tick'] += elapsed
+        self.histogram['tick'][_bucket(elapsed)] += 1
+
+        for name, n in self._counts.items():
+            self.counts[name] += n
+
+        self.last = {
+            'tick': event.tick_count,
+            'seconds': elapsed,
+            'phases': self._phases,
+            'counts': self._counts,
+            'players': len(event.players),
+            'enemies': len(event.enemies),
+            'combat_log': len(event.combat_log),
+            'status_log': len(event.status_log),
+            'debug_log': len(event.debug_log_buffer),
+        }
+
+        if self.sink:
+            self.sink(self.last)
+
+        return self.last
+
+    def snapshot(self) -> dict:
+        """Cumulative totals, histograms and the last tick's record, safe to keep or serialize"""
+        return {
+            'ticks': self.ticks,
+            'total': dict(self.total),
+            'mean': {phase: seconds / self.ticks for phase, seconds in self.total.items()} if self.ticks else {},
+            'histogram': {phase: list(buckets) for phase, buckets in self.histogram.items()},
+            'histogram_bounds_us': [2 ** i for i in range(BUCKETS - 1)] + [None],
+            'counts': dict(self.counts),
+            'last': self.last,
+        }
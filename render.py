@@ -0,0 +1,139 @@
+from __future__ import annotations
+import os
+import sys
+import unicodedata
+
+from typing import Iterable, TextIO
+
+
+ESC = '\x1b['
+EMPTY = ' '
+
+
+def cell_width(cell: str) -> int:
+    """Terminal columns a cell takes, wide glyphs like most emoji take two"""
+    return 2 if any(unicodedata.east_asian_width(ch) in 'WF' for ch in cell) else max(len(cell), 1)
+
+
+def display_order(rows: int) -> list[int]:
+    """
+    Stack depth shown on each screen line, top to bottom
+
+    Even depths go upwards from the middle and odd depths downwards, so crowded positions grow both ways around the
+    line where the first entity stands.
+    """
+    return list(range(rows - 1 if (rows - 1) % 2 == 0 else rows - 2, -1, -2)) + list(range(1, rows, 2))
+
+
+def battlefield(entities: Iterable[tuple[int, str]], size: int, rows: int) -> list[list[str]]:
+    """
+    Occupancy grid of the field, one list of cells per screen line in display order
+
+    entities: (position, glyph) pairs, earlier pairs take the cells closest to the middle. A histogram of how many
+    entities already stand at each position gives the stack depth directly, nothing is scanned per entity.
+    """
+    grid = [[EMPTY] * size for _ in range(rows)]
+    depth = [0] * size
+
+    for position, glyph in entities:
+        d = depth[position]
+        if d < rows:
+            grid[d][position] = glyph
+        depth[position] = d + 1
+
+    return [grid[d] for d in display_order(rows)]
+
+
+class TerminalRenderer:
+    """
+    Redraws a screen of lines in place, only writing the cells that changed since the previous frame
+
+    Lines are sequences of cells: a list of glyphs or a plain string. Changed runs of cells are written at their
+    position with ANSI cursor addressing, and a line whose cell widths shift (a wide glyph replaced by a narrow one)
+    is rewritten from that point on. Nothing is cleared between frames, so there is no flicker.
+    """
+
+    def __init__(self, out: TextIO | None = None) -> None:
+        self.out = out or sys.stdout
+        self.previous = []
+        self._widths = {}
+
+    def start(self) -> None:
+        """Clear the screen once and hide the cursor"""
+        if os.name == 'nt':
+            # enables ANSI escape handling in the Windows console
+            os.system('')
+
+        self.previous = []
+        self.out.write(f'{ESC}2J{ESC}H{ESC}?25l')
+        self.out.flush()
+
+    def close(self) -> None:
+        """Put the cursor back below the last frame"""
+        self.out.write(f'{ESC}{len(self.previous) + 1};1H{ESC}?25h')
+        self.out.flush()
+
+    def __enter__(self) -> TerminalRenderer:
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _width(self, cell: str) -> int:
+        width = self._widths.get(cell)
+        if width is None:
+            width = self._widths[cell] = cell_width(cell)
+        return width
+
+    def _diff(self, row: int, old: list, new: list, parts: list) -> None:
+        col = ocol = 0
+        run = run_col = None
+
+        for i in range(max(len(old), len(new))):
+            cell = new[i] if i < len(new) else None
+            ocell = old[i] if i < len(old) else None
+
+            if col != ocol or cell is None:
+                # layout shifted or the line got shorter, rewrite the rest of it
+                start, start_col = (run, run_col) if run is not None else (i, col)
+                parts.append(f'{ESC}{row};{start_col + 1}H{"".join(new[start:])}{ESC}K')
+                return
+
+            if cell != ocell:
+                if run is None:
+                    run, run_col = i, col
+            elif run is not None:
+                parts.append(f'{ESC}{row};{run_col + 1}H{"".join(new[run:i])}')
+                run = None
+
+            col += self._width(cell)
+            if ocell is not None:
+                ocol += self._width(ocell)
+
+        if run is not None:
+            parts.append(f'{ESC}{row};{run_col + 1}H{"".join(new[run:])}')
+
+    def draw(self, lines: list) -> int:
+        """Bring the screen to lines, returns the number of characters written"""
+        parts = []
+
+        # keep our own copies, callers are free to mutate and pass the same lists again
+        current = [list(line) for line in lines]
+
+        for row, new in enumerate(current, start=1):
+            old = self.previous[row - 1] if row <= len(self.previous) else []
+            if old != new:
+                self._diff(row, old, new, parts)
+
+        for row in range(len(current) + 1, len(self.previous) + 1):
+            parts.append(f'{ESC}{row};1H{ESC}K')
+
+        self.previous = current
+
+        data = ''.join(parts)
+        if data:
+            self.out.write(data)
+            self.out.flush()
+
+        return len(data)
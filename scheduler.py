@@ -0,0 +1,202 @@
+from __future__ import annotations
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import time
+import traceback
+
+from dataclasses import dataclass, field
+
+
+@dataclass
+class TickResult:
+    """What changed in one event during one tick, small enough to ship between processes every tick"""
+    event_id: int
+    tick: int
+    combat: list[str] = field(default_factory=list)      # combat log lines written this tick
+    status: list[tuple] = field(default_factory=list)    # (entity id, position, health) of changed entities
+    removed: list = field(default_factory=list)          # ids of entities that left the field
+    ended: bool = False
+    error: str | None = None                              # traceback of the exception that ended the event
+
+
+class _Tracked:
+    """Worker-side bookkeeping for one event"""
+
+    def __init__(self, event) -> None:
+        self.event = event
+        self.combat_cursor = event.combat_log.next_seq
+        self.last = {}
+
+    def delta(self, event_id: int) -> TickResult:
+        event = self.event
+        result = TickResult(event_id=event_id, tick=event.tick_count, ended=not event.active)
+
+        entries, self.combat_cursor = event.read_combat_log_since(self.combat_cursor)
+        result.combat = [log['msg'] for entry in entries for log in entry['logs']]
+
+        # the end of battle message never makes it past the buffer, see Event.finish
+        if not event.active:
+            result.combat += [log['msg'] for log in event.read_combat_log_buffer()]
+
+        current = {}
+        for entity in itertools.chain(event.players, event.enemies):
+            state = (entity.position, entity.health)
+            current[entity.id] = state
+            if self.last.get(entity.id) != state:
+                result.status.append((entity.id, *state))
+
+        result.removed = [eid for eid in self.last if eid not in current]
+        self.last = current
+
+        return result
+
+
+def _worker(shard: int, commands, results, tickrate: float) -> None:
+    """Own a shard of events, tick all of them every tickrate seconds and report deltas"""
+    tracked = {}
+    next_tick = time.monotonic() + tickrate
+
+    while True:
+        try:
+            cmd = commands.get(timeout=max(0.0, next_tick - time.monotonic()))
+        except queue.Empty:
+            cmd = None
+
+        if cmd is not None:
+            op = cmd[0]
+            if op == 'add':
+                tracked[cmd[1]] = _Tracked(pickle.loads(cmd[2]))
+            elif op == 'remove':
+                tracked.pop(cmd[1], None)
+            elif op == 'stop':
+                break
+
+        if time.monotonic() < next_tick:
+            continue
+
+        batch = []
+        for event_id, track in list(tracked.items()):
+            # a failing event is reported as ended, the rest of the shard keeps running
+            try:
+                if track.event.active:
+                    track.event.step(1)
+
+                result = track.delta(event_id)
+            except Exception:
+                result = TickResult(event_id=event_id, tick=track.event.tick_count, ended=True,
+                                    error=traceback.format_exc())
+
+            batch.append(result)
+
+            if result.ended:
+                del tracked[event_id]
+
+        if batch:
+            results.put((shard, batch))
+
+        # don't try to catch up on missed ticks, a late shard just keeps its cadence from now
+        next_tick = max(next_tick + tickrate, time.monotonic())
+
+
+class WorldScheduler:
+    """
+    Runs many independent Events across worker processes
+
+    Each worker owns a shard of events and ticks all of them every tickrate seconds on its own clock, sending a
+    list of TickResult back per shard tick. Events are pickled into the worker when added, from then on the worker's
+    copy is the live one. Keep log_retention small on the events, the worker only forwards deltas.
+    """
+
+    def __init__(self, workers: int | None = None, tickrate: float = 1.0) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.tickrate = tickrate
+        self._ctx = multiprocessing.get_context()
+        self._results = self._ctx.Queue()
+        self._commands = []
+        self._procs = []
+        self._shard_of = {}
+        self._load = [0] * self.workers
+        self._ids = itertools.count()
+
+    def start(self) -> None:
+        for shard in range(self.workers):
+            commands = self._ctx.Queue()
+            proc = self._ctx.Process(target=_worker, args=(shard, commands, self._results, self.tickrate),
+                                     daemon=True)
+            proc.start()
+            self._commands.append(commands)
+            self._procs.append(proc)
+
+    def add(self, event) -> int:
+        """
+        Hand an event to the least loaded shard, returns the id its TickResults will carry
+
+        The event is pickled here, so one that can't be (a lambda metrics_sink, an open LogSink) raises to the caller.
+        """
+        data = pickle.dumps(event)
+
+        if not self._procs:
+            self.start()
+
+        event_id = next(self._ids)
+        shard = self._load.index(min(self._load))
+        self._shard_of[event_id] = shard
+        self._load[shard] += 1
+        self._commands[shard].put(('add', event_id, data))
+
+        return event_id
+
+    def remove(self, event_id: int) -> None:
+        shard = self._shard_of.pop(event_id, None)
+        if shard is not None:
+            self._load[shard] -= 1
+            self._commands[shard].put(('remove', event_id))
+
+    def active(self) -> int:
+        """Number of events still running as far as the parent has heard"""
+        return len(self._shard_of)
+
+    def poll(self, timeout: float | None = None) -> list[TickResult]:
+        """
+        Collect results sent so far, waiting up to timeout for the first batch if nothing is queued
+
+        Ended events, including those that raised (see TickResult.error), are released from their shard here.
+        """
+        out = []
+
+        try:
+            _, batch = self._results.get(timeout=timeout) if timeout else self._results.get_nowait()
+            out += batch
+            while True:
+                _, batch = self._results.get_nowait()
+                out += batch
+        except queue.Empty:
+            pass
+
+        for result in out:
+            if result.ended and result.event_id in self._shard_of:
+                self._load[self._shard_of.pop(result.event_id)] -= 1
+
+        return out
+
+    def close(self) -> None:
+        for commands in self._commands:
+            commands.put(('stop',))
+
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+
+        self._commands = []
+        self._procs = []
+
+    def __enter__(self) -> WorldScheduler:
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,211 @@
+"""
+Monte Carlo battle runner for balancing
+
+    python simulate.py --seeds 1000                  # every demo class against a mixed army, plus NPCs vs monsters
+    python simulate.py --seeds 500 --level 10 50     # NPCs vs monsters at several levels
+    python simulate.py --workers 8 --max-ticks 2000
+
+Battles run headless across a process pool, results stream back as they finish and are folded into one Aggregate per
+matchup. Every battle is fully determined by its matchup and seed.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+from event import Event
+from generators import generate_monsters, generate_npcs
+from logs import HIT
+from templates import CLASSES
+
+
+# composition entries that aren't demo classes, generated at the matchup's level
+NPC = 'npc'
+MONSTER = 'monster'
+
+# ticks at which the summary reports survival
+CURVE_TICKS = (10, 25, 50, 100, 250)
+
+
+@dataclass(frozen=True)
+class Matchup:
+    """Who fights whom: (class name, count) pairs per side, class names are templates.CLASSES names, NPC or MONSTER"""
+    name: str
+    players: tuple[tuple[str, int], ...]
+    enemies: tuple[tuple[str, int], ...]
+    level: int = 1
+    size: int = 100
+
+
+@dataclass
+class BattleResult:
+    matchup: str
+    seed: int
+    winner: str                                               # 'players', 'enemies', 'draw' or 'timeout'
+    ticks: int
+    damage: dict[str, int] = field(default_factory=dict)     # damage dealt per 'side:class'
+    alive: list[tuple[int, int]] = field(default_factory=list)   # (players, enemies) alive after each tick
+    start: tuple[int, int] = (0, 0)
+
+
+def _join(event: Event, composition, level: int, seed, team: str, classes: dict) -> None:
+    templates = {template.name: template for template in CLASSES}
+    add = event.add_player if team == 'players' else event.add_enemy
+
+    for cls, count in composition:
+        if cls in (NPC, MONSTER):
+            generate = generate_npcs if cls == NPC else generate_monsters
+            spawned = generate(count, seed, level)
+            for entity in spawned:
+                add(entity)
+        else:
+            spawned = event.spawn(templates[cls], count, team)
+
+        classes.update((entity.id, f'{team}:{cls}') for entity in spawned)
+
+
+def battle(matchup: Matchup, seed: int, max_ticks: int = 1000) -> BattleResult:
+    """Run one battle to the end, or to max_ticks, and collect its statistics"""
+    event = Event(matchup.size, headless=True, seed=seed)
+    classes = {}
+    _join(event, matchup.players, matchup.level, f'{seed}:players', 'players', classes)
+    _join(event, matchup.enemies, matchup.level, f'{seed}:enemies', 'enemies', classes)
+
+    result = BattleResult(matchup.name, seed, 'timeout', 0, start=(len(event.players), len(event.enemies)))
+    event.run_until_done(max_ticks)
+    result.ticks = event.tick_count
+
+    if not event.active:
+        result.winner = 'players' if event.players else 'enemies' if event.enemies else 'draw'
+
+    damage = Counter()
+    for idx in range(len(event.combat_log)):
+        for _, kind, actor, _, amount in event.combat_log.records(idx):
+            if kind == HIT:
+                damage[classes[actor]] += amount
+    result.damage = dict(damage)
+
+    status = event.status_log
+    for idx in range(len(status)):
+        nplayers, packed = status.entry(idx)
+        result.alive.append((nplayers, len(packed) // 3 - nplayers))
+
+    return result
+
+
+def _battle(args: tuple) -> BattleResult:
+    return battle(*args)
+
+
+def run(matchups: Iterable[Matchup], seeds: Iterable[int], workers: int | None = None,
+        max_ticks: int = 1000) -> Iterator[BattleResult]:
+    """Yield BattleResults as the pool finishes them, in the order of matchups then seeds"""
+    jobs = [(matchup, seed, max_ticks) for matchup in matchups for seed in seeds]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        yield from map(_battle, jobs)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        yield from pool.map(_battle, jobs, chunksize=max(1, len(jobs) // (workers * 8)))
+
+
+class Aggregate:
+    """Running statistics of every battle of one matchup"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.battles = 0
+        self.wins = Counter()
+        self.ticks = []
+        self.damage = Counter()
+        self.survival = defaultdict(lambda: [0.0, 0.0])
+
+    def add(self, result: BattleResult) -> None:
+        self.battles += 1
+        self.wins[result.winner] += 1
+        self.ticks.append(result.ticks)
+        self.damage.update(result.damage)
+
+        # alive[i] is taken after tick i + 1, a finished battle stays at its last frame
+        players, enemies = result.start
+        for tick in CURVE_TICKS:
+            alive = result.alive[min(tick, len(result.alive)) - 1] if result.alive else result.start
+            curve = self.survival[tick]
+            curve[0] += alive[0] / players if players else 0.0
+            curve[1] += alive[1] / enemies if enemies else 0.0
+
+    def win_rate(self, side: str) -> float:
+        return self.wins[side] / self.battles if self.battles else 0.0
+
+    def survival_curve(self) -> dict[int, tuple[float, float]]:
+        """Mean fraction of each side still standing at every CURVE_TICKS tick"""
+        return {tick: (p / self.battles, e / self.battles) for tick, (p, e) in sorted(self.survival.items())}
+
+    def ticks_percentile(self, pct: float) -> int:
+        ordered = sorted(self.ticks)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0
+
+
+def summary_table(aggregates: Iterable[Aggregate]) -> str:
+    aggregates = list(aggregates)
+    lines = [f"{'matchup':<28} {'battles':>7} {'players':>8} {'enemies':>8} {'draw':>6} {'timeout':>8} "
+             f"{'ticks':>7} {'p50':>5} {'p90':>5}"]
+
+    for agg in aggregates:
+        lines.append(f'{agg.name:<28} {agg.battles:>7} {agg.win_rate("players"):>8.1%} '
+                     f'{agg.win_rate("enemies"):>8.1%} {agg.win_rate("draw"):>6.1%} {agg.win_rate("timeout"):>8.1%} '
+                     f'{sum(agg.ticks) / max(agg.battles, 1):>7.1f} {agg.ticks_percentile(50):>5} '
+                     f'{agg.ticks_percentile(90):>5}')
+
+    lines += ['', f"{'matchup':<28} {'class':<20} {'damage/battle':>13}"]
+    for agg in aggregates:
+        for cls, total in sorted(agg.damage.items()):
+            lines.append(f'{agg.name:<28} {cls:<20} {total / agg.battles:>13.1f}')
+
+    lines += ['', f"{'matchup':<28} " + ' '.join(f'{f"t{tick} P/E":>12}' for tick in CURVE_TICKS)]
+    for agg in aggregates:
+        curve = agg.survival_curve()
+        lines.append(f'{agg.name:<28} ' + ' '.join(f'{f"{p:.0%}/{e:.0%}":>12}' for p, e in curve.values()))
+
+    return '\n'.join(lines)
+
+
+def default_matchups(levels: Iterable[int], teamsize: int) -> list[Matchup]:
+    """Each demo class against an even mix of all classes, and NPCs against monsters at every level"""
+    per_class = max(1, teamsize // len(CLASSES))
+    mixed = tuple((template.name, per_class) for template in CLASSES)
+
+    matchups = [Matchup(f'{template.name} vs mixed', ((template.name, per_class * len(CLASSES)),), mixed)
+                for template in CLASSES]
+    matchups += [Matchup(f'npc vs monster L{level}', ((NPC, teamsize),), ((MONSTER, teamsize),), level=level)
+                 for level in levels]
+
+    return matchups
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seeds', type=int, default=200, help='battles per matchup, seeded 0..n-1')
+    parser.add_argument('--level', type=int, nargs='+', default=[10, 50], help='levels for generated rosters')
+    parser.add_argument('--teamsize', type=int, default=12)
+    parser.add_argument('--workers', type=int, default=None, help='processes, defaults to the cpu count')
+    parser.add_argument('--max-ticks', type=int, default=1000, help='battles still running after this time out')
+    args = parser.parse_args()
+
+    matchups = default_matchups(args.level, args.teamsize)
+    aggregates = {m.name: Aggregate(m.name) for m in matchups}
+
+    for done, result in enumerate(run(matchups, range(args.seeds), args.workers, args.max_ticks), start=1):
+        aggregates[result.matchup].add(result)
+        if done % 100 == 0:
+            print(f'{done} battles', end='\r', file=sys.stderr, flush=True)
+
+    print(file=sys.stderr)
+    print(summary_table(aggregates.values()))
@@ -0,0 +1,152 @@
+"""
+Compact binary checkpoints of an Event
+
+Layout, little endian, version 3 (version 2 had no seed, version 1 a single rng stream):
+
+    header     MAGIC, version, flags, size, tick_count, next_entity_id, player count, enemy count
+    seed       whether it is an int, then (length, utf-8) of the event's seed
+    strings    count, then (length, utf-8 bytes) for every distinct name and stance
+    entities   one fixed-width ENTITY record per entity, players first, both in list order
+    rng        count, then per stream: version, the 625 Mersenne Twister words, whether a gauss value is cached and
+               the value
+
+Logs, buffers and targets are not part of a checkpoint, targets are recomputed every tick and a restored event starts
+with empty logs.
+"""
+from __future__ import annotations
+import struct
+
+from entity import Entity
+
+
+MAGIC = b'EVSN'
+VERSION = 3
+
+HEADER = struct.Struct('<4sHBiqqII')
+ENTITY = struct.Struct('<13iB')
+RNG = struct.Struct('<B625I?d')
+COUNT = struct.Struct('<I')
+LENGTH = struct.Struct('<H')
+SEED = struct.Struct('<?I')
+
+# header flags
+ACTIVE = 1
+HEADLESS = 2
+ARRAY_ENGINE = 4
+
+# entity flags
+ISPLAYER = 1
+NO_LAST_ATTACK = 2
+
+
+def dump(event) -> bytes:
+    entities = event.players + event.enemies
+    strings = {}
+    for entity in entities:
+        strings.setdefault(entity.name, len(strings))
+        strings.setdefault(entity.stance, len(strings))
+
+    flags = ((ACTIVE if event.active else 0) | (HEADLESS if event.headless else 0)
+             | (ARRAY_ENGINE if event.engine else 0))
+    parts = [HEADER.pack(MAGIC, VERSION, flags, event.size, event.tick_count, event.next_entity_id,
+                         len(event.players), len(event.enemies))]
+
+    # any other seed comes back as its str(), which derives the same rng streams
+    seed = str(event.seed).encode('utf-8')
+    parts += [SEED.pack(isinstance(event.seed, int), len(seed)), seed, COUNT.pack(len(strings))]
+
+    for string in strings:
+        raw = string.encode('utf-8')
+        parts += [LENGTH.pack(len(raw)), raw]
+
+    for e in entities:
+        parts.append(ENTITY.pack(e.id, e.attackrate, e.damage, e.max_health, e.health, e.range, e.speed,
+                                 e.max_targets, e.initiative, e.position,
+                                 e.last_attack if e.last_attack is not None else 0,
+                                 strings[e.name], strings[e.stance],
+                                 (ISPLAYER if e.isplayer else 0) | (NO_LAST_ATTACK if e.last_attack is None else 0)))
+
+    parts.append(pack_rng(event))
+
+    return b''.join(parts)
+
+
+def pack_rng(event) -> bytes:
+    """The rng section, count and the state of every stream of event.rng_streams()"""
+    streams = event.rng_streams()
+    parts = [COUNT.pack(len(streams))]
+
+    for rng in streams:
+        version, words, gauss = rng.getstate()
+        parts.append(RNG.pack(version, *words, gauss is not None, gauss or 0.0))
+
+    return b''.join(parts)
+
+
+def unpack_rng(event, data: bytes, offset: int = 0) -> int:
+    """Restore event.rng_streams() from a pack_rng() section at offset, returns the offset past it"""
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    streams = event.rng_streams()
+    if count != len(streams):
+        raise ValueError(f'snapshot has {count} rng streams, expected {len(streams)}')
+
+    for rng in streams:
+        version, *words, has_gauss, gauss = RNG.unpack_from(data, offset)
+        offset += RNG.size
+        rng.setstate((version, tuple(words), gauss if has_gauss else None))
+
+    return offset
+
+
+def load(data: bytes, **kwargs):
+    """Rebuild an Event from dump() output, kwargs override the Event options stored in the checkpoint"""
+    from event import Event
+
+    magic, version, flags, size, tick_count, next_entity_id, nplayers, nenemies = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('not an Event snapshot')
+    if version != VERSION:
+        raise ValueError(f'unsupported snapshot version {version}, expected {VERSION}')
+
+    offset = HEADER.size
+    is_int, length = SEED.unpack_from(data, offset)
+    offset += SEED.size
+    seed = data[offset:offset + length].decode('utf-8')
+    offset += length
+
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+
+    strings = []
+    for _ in range(count):
+        (length,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        strings.append(data[offset:offset + length].decode('utf-8'))
+        offset += length
+
+    kwargs.setdefault('seed', int(seed) if is_int else seed)
+    kwargs.setdefault('headless', bool(flags & HEADLESS))
+    kwargs.setdefault('engine', 'array' if flags & ARRAY_ENGINE else 'object')
+    event = Event(size, **kwargs)
+    event.tick_count = tick_count
+    event.active = bool(flags & ACTIVE)
+
+    for record in ENTITY.iter_unpack(data[offset:offset + ENTITY.size * (nplayers + nenemies)]):
+        (eid, attackrate, damage, max_health, health, range_, speed, max_targets, initiative, position,
+         last_attack, name, stance, eflags) = record
+
+        entity = Entity(name=strings[name], attackrate=attackrate, damage=damage, health=max_health, range=range_,
+                        speed=speed, stance=strings[stance], initiative=initiative, max_targets=max_targets)
+        entity.id = eid
+        entity.health = health
+        entity.position = position
+        entity.last_attack = None if eflags & NO_LAST_ATTACK else last_attack
+        entity.isplayer = bool(eflags & ISPLAYER)
+        event.rejoin(entity)
+
+    offset += ENTITY.size * (nplayers + nenemies)
+    event.next_entity_id = next_entity_id
+    unpack_rng(event, data, offset)
+
+    return event
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, insort
+
+
+class RingIndex:
+    """
+    Position-sorted index of one team on the circular battlefield
+
+    Entities are kept ordered by (position, seq) where seq is the order in which they joined the index, which matches
+    the order of the team list on the Event. Ties are broken the same way Entity.update_targets always has: by list
+    order, or by id when sticky.
+
+    Stat rankings (range, initiative), and the index re-sorted with stat ties at equal positions, are built on first
+    use and then maintained, stats are assumed fixed for the lifetime of an entity.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._keys = []
+        self._entities = []
+        self._where = {}
+        self._seq = {}
+        self._counter = 0
+        self._ranked = {}
+        # rank_key -> (keys, entities) sorted by (position, rank, seq) instead of (position, seq)
+        self._positioned = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, entity) -> bool:
+        return entity in self._where
+
+    def seq(self, entity) -> int:
+        return self._seq[entity]
+
+    def position(self, entity) -> int | None:
+        """Position the entity is indexed at, which lags behind entity.position until update()"""
+        key = self._where.get(entity)
+        return key[0] if key else None
+
+    def add(self, entity) -> None:
+        seq = self._counter
+        self._counter += 1
+        self._seq[entity] = seq
+        self._insert(entity, (entity.position % self.size, seq))
+
+        for rank_key, ranked in self._ranked.items():
+            insort(ranked, (self._rank(entity, *rank_key), seq, entity))
+
+    def extend(self, entities: list) -> None:
+        """Add many entities at once, sorting the index once instead of inserting one by one"""
+        new = []
+        for entity in entities:
+            self._seq[entity] = self._counter
+            new.append(((entity.position % self.size, self._counter), entity))
+            self._counter += 1
+
+        pairs = sorted(list(zip(self._keys, self._entities)) + new)
+        self._keys = [key for key, _ in pairs]
+        self._entities = [e for _, e in pairs]
+        self._where.update((e, key) for key, e in new)
+        self._positioned.clear()
+
+        for rank_key, ranked in self._ranked.items():
+            ranked.extend((self._rank(e, *rank_key), self._seq[e], e) for _, e in new)
+            ranked.sort()
+
+    def remove(self, entity) -> None:
+        if entity not in self._where:
+            return
+
+        self._delete(entity)
+
+        for rank_key, ranked in self._ranked.items():
+            item = (self._rank(entity, *rank_key), self._seq[entity])
+            del ranked[bisect_left(ranked, item)]
+
+        del self._seq[entity]
+
+    def update(self, entity) -> None:
+        """Re-sort an entity after its position changed"""
+        if entity not in self._where:
+            return
+
+        self._delete(entity)
+        self._insert(entity, (entity.position % self.size, self._seq[entity]))
+
+    def rebuild(self, entities: list) -> None:
+        """Re-sort the whole index from a team list in one go, dropping anything no longer in it"""
+        alive = set(entities)
+        for entity in [e for e in self._seq if e not in alive]:
+            self.remove(entity)
+
+        for entity in entities:
+            if entity not in self._seq:
+                self.add(entity)
+
+        pairs = sorted(((e.position % self.size, self._seq[e]), e) for e in entities)
+        self._keys = [key for key, _ in pairs]
+        self._entities = [e for _, e in pairs]
+        self._where = {e: key for key, e in pairs}
+        self._positioned.clear()
+
+    def _insert(self, entity, key: tuple) -> None:
+        idx = bisect_left(self._keys, key)
+        self._keys.insert(idx, key)
+        self._entities.insert(idx, entity)
+        self._where[entity] = key
+
+        for rank_key, (keys, entities) in self._positioned.items():
+            pkey = (key[0], self._rank(entity, *rank_key), key[1])
+            idx = bisect_left(keys, pkey)
+            keys.insert(idx, pkey)
+            entities.insert(idx, entity)
+
+    def _delete(self, entity) -> None:
+        pos, seq = key = self._where.pop(entity)
+        idx = bisect_left(self._keys, key)
+        del self._keys[idx]
+        del self._entities[idx]
+
+        for rank_key, (keys, entities) in self._positioned.items():
+            idx = bisect_left(keys, (pos, self._rank(entity, *rank_key), seq))
+            del keys[idx]
+            del entities[idx]
+
+    def _tiebreak(self, entity, sticky: bool):
+        return entity.id if sticky else self._seq[entity]
+
+    def _rank(self, entity, stat: str, reverse: bool, sticky: bool) -> tuple:
+        value = getattr(entity, stat)
+        return -value if reverse else value, self._tiebreak(entity, sticky)
+
+    def best(self, stat: str, reverse: bool, sticky: bool):
+        """Entity ranked first by stat, equivalent to the head of a stable sort over the team list"""
+        rank_key = (stat, reverse, sticky)
+        ranked = self._ranked.get(rank_key)
+
+        if ranked is None:
+            ranked = sorted((self._rank(e, *rank_key), self._seq[e], e) for e in self._entities)
+            self._ranked[rank_key] = ranked
+
+        return ranked[0][2] if ranked else None
+
+    def nearest(self, pos: int, k: int, exclude=None, rank: tuple | None = None) -> list:
+        """
+        Return up to k (distance, entity) pairs closest to pos going either way around the ring
+
+        Walks outward from pos in both directions, a whole position at a time, and only reads as many entities from
+        each position as are still needed.
+        rank: (stat, reverse, sticky) to order entities at equal distance the way best() ranks them, defaults to
+              list order
+        """
+        if k <= 0 or not self._keys:
+            return []
+
+        if rank is None:
+            return self._walk(self._keys, self._entities, pos, k, exclude)
+
+        return self._walk(*self._by_position(rank), pos, k, exclude)
+
+    def _by_position(self, rank_key: tuple) -> tuple[list, list]:
+        positioned = self._positioned.get(rank_key)
+
+        if positioned is None:
+            pairs = sorted(((pos, self._rank(e, *rank_key), seq), e) for e, (pos, seq) in self._where.items())
+            positioned = self._positioned[rank_key] = ([key for key, _ in pairs], [e for _, e in pairs])
+
+        return positioned
+
+    def _walk(self, keys: list, entities: list, pos: int, k: int, exclude) -> list:
+        """
+        nearest() over keys sorted by position, then by how ties at one distance are ordered
+
+        Entities at one position are already in tiebreak order, so only as many as are still needed are read from
+        each position instead of every tie, which matters on crowded fields.
+        """
+        size = self.size
+        n = len(keys)
+        pos %= size
+        right = bisect_left(keys, (pos,)) % n
+        left = (right - 1) % n
+        remaining = n
+        found = []
+
+        while len(found) < k and remaining:
+            rpos = keys[right][0]
+            lpos = keys[left][0]
+            rdist = (rpos - pos) % size
+            ldist = (pos - lpos) % size
+            dist = min(rdist, ldist)
+            need = k - len(found)
+            if exclude is not None:
+                need += 1
+
+            runs = []
+            if rdist == dist:
+                end = bisect_left(keys, (rpos + 1,))
+                runs.append((right, end))
+                remaining -= end - right
+                right = end % n
+
+            if ldist == dist and remaining:
+                start = bisect_left(keys, (lpos,))
+                if not runs or start != runs[0][0]:
+                    runs.append((start, left + 1))
+                    remaining -= left + 1 - start
+                    left = (start - 1) % n
+
+            group = [(keys[i][1:], entities[i]) for lo, hi in runs for i in range(lo, min(hi, lo + need))]
+            if len(runs) > 1:
+                group.sort(key=lambda pair: pair[0])
+
+            found += [(dist, e) for _, e in group if e is not exclude][:k - len(found)]
+
+        return found
+
+
+class TargetCache:
+    """
+    Dirty tracking for the target selections entities keep between ticks, see Entity.update_targets
+
+    Every move stamps the old and new position of the mover with an increasing clock. A cached selection is still
+    valid while its owner hasn't moved, all of its targets are still on the field, no opponent has joined since, and
+    no opponent stamp within its radius (the distance of the farthest target picked by distance) is newer than the
+    selection. Moves and deaths cost O(1) here, the check costs one max() over the owner's window.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.clock = 0
+        self.roster = 0
+        # last change per ring position, keyed by isplayer of the entity that moved
+        self._stamps = {True: array('q', bytes(8 * size)), False: array('q', bytes(8 * size))}
+
+    def store(self, entity, key: tuple, selection: list, radius: int) -> None:
+        entity._selection = (key, self.clock, self.roster, radius, selection)
+
+    def lookup(self, entity, key: tuple, index: RingIndex) -> list | None:
+        """The entity's cached selection for key if nothing relevant changed since it was made, else None"""
+        cached = entity._selection
+        if cached is None:
+            return None
+
+        ckey, clock, roster, radius, selection = cached
+        if ckey != key or roster != self.roster:
+            return None
+
+        for target in selection:
+            if target not in index:
+                return None
+
+        if radius >= 0:
+            size = self.size
+            stamps = self._stamps[not entity.isplayer]
+            lo = entity.position % size - radius
+            hi = entity.position % size + radius + 1
+
+            if hi - lo >= size:
+                latest = max(stamps)
+            elif lo < 0:
+                latest = max(max(stamps[lo:]), max(stamps[:hi]))
+            elif hi > size:
+                latest = max(max(stamps[lo:]), max(stamps[:hi - size]))
+            else:
+                latest = max(stamps[lo:hi])
+
+            if latest > clock:
+                return None
+
+        return selection
+
+    def moved(self, entity, old: int | None, new: int) -> None:
+        entity._selection = None
+        self.clock += 1
+        stamps = self._stamps[entity.isplayer]
+        if old is not None:
+            stamps[old % self.size] = self.clock
+        stamps[new % self.size] = self.clock
+
+    def joined(self) -> None:
+        """A new opponent can outrank anything already selected, drop every selection"""
+        self.roster += 1
+
+    reset = joined
@@ -0,0 +1,214 @@
+"""
+Stance registry, what entities of each stance do with their targets every tick
+
+A stance is a batch kernel, kernel(event, entities, rows, buffers), called once per tick with every live entity of
+that stance, players first, both in list order. Kernels pick targets with Entity.update_targets, which serves them
+from the event's ring indexes and target cache, and write each entity's decision into its row of the tick buffers.
+The event applies the rows as attacks and moves in roster order, so it doesn't matter which stance runs first.
+
+    def hold(event, entities, rows, buffers):
+        for entity, row, targets in zip(entities, rows, select_targets(event, entities, 'distance')):
+            for target in targets:
+                if target['distance'] <= entity.range:
+                    buffers.attack(row, target['target'])
+
+    register('hold', hold)
+"""
+from __future__ import annotations
+import logging
+import math
+import time
+
+from array import array
+from typing import Callable
+
+
+# decision traces go through the event logger, at DEBUG while the event has debug set
+logger = logging.getLogger('event')
+
+
+class TickBuffers:
+    """
+    Action slots of one tick, a row per acting entity of the roster (players, then enemies)
+
+    moving[row] is set for an entity that moves moves[row], otherwise it hits the first nhits[row] entities of its
+    width slots in hits, starting at row * width. An entity that moves doesn't attack. The slots are kept from tick to
+    tick and only reallocated when the roster or max_targets outgrow them, reset() just clears the rows in use.
+    """
+
+    def __init__(self) -> None:
+        self.entities = []
+        self.rows = 0
+        self.capacity = 0
+        self.width = 1
+        self._allocate(0, 1)
+
+    def _allocate(self, capacity: int, width: int) -> None:
+        self.capacity = capacity
+        self.width = width
+        self.moving = bytearray(capacity)
+        self.moves = [0] * capacity
+        self.nhits = array('i', bytes(4 * capacity))
+        self.hits = [None] * (capacity * width)
+        self._zeros = array('i', bytes(4 * capacity))
+
+    def reset(self, entities: list, width: int) -> None:
+        """Clear the rows of a new tick's roster, width is the largest max_targets among them"""
+        rows = len(entities)
+        width = max(width, 1)
+
+        if rows > self.capacity or width > self.width:
+            self._allocate(max(rows, 2 * self.capacity), max(width, self.width))
+        else:
+            memoryview(self.moving)[:rows] = memoryview(self._zeros).cast('B')[:rows]
+            memoryview(self.nhits)[:rows] = memoryview(self._zeros)[:rows]
+
+        self.entities = entities
+        self.rows = rows
+
+    def move(self, row: int, distance: int) -> None:
+        self.moving[row] = 1
+        self.moves[row] = distance
+
+    def attack(self, row: int, target) -> None:
+        count = self.nhits[row]
+        if count == self.width:
+            raise ValueError(f'{self.entities[row].name} already attacks {count} targets, more than max_targets')
+
+        self.hits[row * self.width + count] = target
+        self.nhits[row] = count + 1
+
+
+def select_targets(event, entities: list, prio_key: str, reverse: bool = False, sticky: bool = False) -> list:
+    """update_targets of every entity, timed as the targeting phase when the event is profiling"""
+    prof = event.profiler
+    if not prof:
+        return [e.update_targets(prio_key, reverse, sticky) for e in entities]
+
+    start = time.perf_counter()
+    targets = [e.update_targets(prio_key, reverse, sticky) for e in entities]
+    prof.add('targeting', time.perf_counter() - start)
+    return targets
+
+
+def skirmish(event, entities: list, rows: list, buffers: TickBuffers) -> None:
+    """
+    Entities prioritize targeting the closest targets, opting to "back up" and out-range when viable
+    """
+    debug = event.debug
+    randint = event.tiebreak_rng.randint
+    moving, moves, hits, nhits, width = buffers.moving, buffers.moves, buffers.hits, buffers.nhits, buffers.width
+
+    for entity, row, targets in zip(entities, rows, select_targets(event, entities, 'distance')):
+        if debug:
+            logger.debug('%s is at position %s before processing actions', entity.name, entity.position)
+
+        base = slot = row * width
+        for target in targets:
+            if debug:
+                logger.debug('%s looping targets: %s, %s, %s', entity.name, target['target'].name,
+                             target['distance'], target['target'].position)
+
+            not_in_atk_range = entity.range < target['distance']
+            worth_kiting = math.ceil(((min(entity.range, entity.speed) - target['target'].range)
+                                      / max(target['target'].speed, 1))) >= 2
+            in_enemy_range = target['target'].range >= target['distance']
+
+            if not_in_atk_range or (worth_kiting and in_enemy_range):
+                dir = 1 if entity.position < target['target'].position else -1
+
+                # Move away if too close
+                if target['distance'] < entity.range:
+                    dir *= -1
+
+                # Flip direction if outer
+                if target['direction'] != 'inner':
+                    dir *= -1
+
+                # Random direction if same position
+                if entity.position == target['target'].position:
+                    dir *= randint(-1, 1)
+
+                distance = (min(entity.speed, (abs(target['distance'] - entity.range)))) * dir
+                moving[row] = 1
+                moves[row] = distance
+
+                if debug:
+                    logger.debug('%s move %s with range %s based on:target: %s distance: %s range: %s'
+                                 ' not_in_atk_range: %s, or worth_kiting: %s, and in_enemy_range: %s',
+                                 entity.name, distance, entity.range, target['target'].name, target['distance'],
+                                 target['target'].range, not_in_atk_range, worth_kiting, in_enemy_range)
+
+                # no reason to evaluate the other targets once moving
+                break
+
+            if target['distance'] <= entity.range:
+                hits[slot] = target['target']
+                slot += 1
+
+        else:
+            # only published when the entity stays put
+            nhits[row] = slot - base
+
+
+def assassin(event, entities: list, rows: list, buffers: TickBuffers) -> None:
+    """
+    Entities prioritize the target with the greatest range, and will not switch targets until dead
+    """
+    debug = event.debug
+    moving, moves, hits, nhits, width = buffers.moving, buffers.moves, buffers.hits, buffers.nhits, buffers.width
+
+    for entity, row, targets in zip(entities, rows, select_targets(event, entities, 'range', True, True)):
+        if debug:
+            logger.debug('%s is at position %s before processing actions', entity.name, entity.position)
+
+        base = slot = row * width
+        for target in targets:
+            if debug:
+                logger.debug('%s looping targets: %s, %s, %s', entity.name, target['target'].name,
+                             target['distance'], target['target'].position)
+
+            not_in_atk_range = entity.range < target['distance']
+
+            if not_in_atk_range:
+                dir = 1 if entity.position < target['target'].position else -1
+
+                # Flip direction if outer
+                if target['direction'] != 'inner':
+                    dir *= -1
+
+                distance = (min(entity.speed, (abs(target['distance'] - entity.range)))) * dir
+                moving[row] = 1
+                moves[row] = distance
+
+                if debug:
+                    logger.debug('%s move %s with range %s based on:target: %s distance: %s range: %s'
+                                 ' not_in_atk_range: %s', entity.name, distance, entity.range,
+                                 target['target'].name, target['distance'], target['target'].range, not_in_atk_range)
+
+                # no reason to evaluate the other targets once moving
+                break
+
+            if target['distance'] <= entity.range:
+                hits[slot] = target['target']
+                slot += 1
+
+        else:
+            # only published when the entity stays put
+            nhits[row] = slot - base
+
+
+KERNELS = {'skirmish': skirmish, 'assassin': assassin}
+
+
+def register(name: str, kernel: Callable) -> None:
+    """Add or replace the batch kernel of a stance"""
+    KERNELS[name] = kernel
+
+
+def kernel(name: str) -> Callable:
+    """Batch kernel of a stance, raises ValueError for a stance nobody registered"""
+    try:
+        return KERNELS[name]
+    except KeyError:
+        raise ValueError(f"unknown stance '{name}', registered stances: {', '.join(KERNELS)}") from None
@@ -0,0 +1,245 @@
+"""
+SQLite persistence for Events and their Entities
+
+    store = EventStore('battles.db')
+    event_id = store.add(event)
+    while event.active:
+        event.step(1)
+        store.sync(event_id)
+    ...
+    event = store.load(event_id)
+
+Entities reference their event by event_id. Dead entities keep their row with the tick they died at, a loaded event
+only brings back the living. The database runs in WAL mode, so readers aren't blocked by a sync in progress.
+"""
+from __future__ import annotations
+import sqlite3
+
+from entity import Entity
+from logs import DEATH, HIT, MOVE
+from snapshot import pack_rng, unpack_rng
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS events (
+    id              INTEGER PRIMARY KEY,
+    size            INTEGER NOT NULL,
+    seed            TEXT    NOT NULL,
+    seed_is_int     INTEGER NOT NULL,
+    engine          TEXT    NOT NULL,
+    headless        INTEGER NOT NULL,
+    active          INTEGER NOT NULL,
+    tick_count      INTEGER NOT NULL,
+    next_entity_id  INTEGER NOT NULL,
+    rng             BLOB    NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS events_active ON events (id) WHERE active = 1;
+
+CREATE TABLE IF NOT EXISTS entities (
+    event_id     INTEGER NOT NULL REFERENCES events (id) ON DELETE CASCADE,
+    id           INTEGER NOT NULL,
+    isplayer     INTEGER NOT NULL,
+    name         TEXT    NOT NULL,
+    attackrate   INTEGER NOT NULL,
+    damage       INTEGER NOT NULL,
+    max_health   INTEGER NOT NULL,
+    health       INTEGER NOT NULL,
+    range        INTEGER NOT NULL,
+    speed        INTEGER NOT NULL,
+    max_targets  INTEGER NOT NULL,
+    initiative   INTEGER NOT NULL,
+    position     INTEGER NOT NULL,
+    last_attack  INTEGER,
+    stance       TEXT    NOT NULL,
+    died         INTEGER,
+    PRIMARY KEY (event_id, id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS entities_alive ON entities (event_id, isplayer DESC, id) WHERE died IS NULL;
+'''
+
+# entity columns in insert order, after event_id
+COLUMNS = ('id', 'isplayer', 'name', 'attackrate', 'damage', 'max_health', 'health', 'range', 'speed', 'max_targets',
+           'initiative', 'position', 'last_attack', 'stance')
+
+
+class _Tracked:
+    """What the database already holds of one live event"""
+
+    def __init__(self, event) -> None:
+        self.event = event
+        self.entities = {e.id: e for e in event.players + event.enemies}
+        self.next_entity_id = event.next_entity_id
+        self.cursor = event.combat_log.next_seq
+
+
+class EventStore:
+    """
+    Events and Entities in a SQLite database, written a tick's changes at a time
+
+    Dirty tracking rides on the combat log: every change of position, health or life on the field is a MOVE, HIT or
+    DEATH record, so sync() only writes the entities named in the records since the previous sync, plus anyone who
+    joined, all in one transaction. Changes made outside of ticks (moving an entity by hand) are only picked up by
+    sync(full=True).
+    """
+
+    def __init__(self, path: str) -> None:
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        # WAL keeps committed transactions durable against crashes at NORMAL, only a power loss can drop the last ones
+        self.conn.execute('PRAGMA synchronous = NORMAL')
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.executescript(SCHEMA)
+        self._tracked = {}
+
+    def _row(self, event_id: int, e: Entity) -> tuple:
+        return (event_id, e.id, e.isplayer, e.name, e.attackrate, e.damage, e.max_health, e.health, e.range, e.speed,
+                e.max_targets, e.initiative, e.position, e.last_attack, e.stance)
+
+    def _insert(self, event_id: int, entities: list) -> None:
+        self.conn.executemany(f'INSERT INTO entities ({", ".join(("event_id",) + COLUMNS)}) '
+                              f'VALUES ({", ".join("?" * (len(COLUMNS) + 1))})',
+                              [self._row(event_id, e) for e in entities])
+
+    def _update_event(self, event_id: int, event) -> None:
+        self.conn.execute('UPDATE events SET active = ?, tick_count = ?, next_entity_id = ?, rng = ? WHERE id = ?',
+                          (event.active, event.tick_count, event.next_entity_id, pack_rng(event), event_id))
+
+    def add(self, event) -> int:
+        """Insert an event and everyone on its field, returns its event_id and keeps tracking it for sync()"""
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO events (size, seed, seed_is_int, engine, headless, active, tick_count, next_entity_id, '
+                'rng) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                # any other seed comes back as its str(), which derives the same rng streams
+                (event.size, str(event.seed), isinstance(event.seed, int), 'array' if event.engine else 'object',
+                 event.headless, event.active, event.tick_count, event.next_entity_id, pack_rng(event)))
+            event_id = cursor.lastrowid
+            self._insert(event_id, event.players + event.enemies)
+
+        self._tracked[event_id] = _Tracked(event)
+        return event_id
+
+    def sync(self, event_id: int, full: bool = False) -> int:
+        """
+        Write what changed in a tracked event since the last add(), load() or sync(), returns the entity rows written
+
+        Falls back to writing every live entity when the combat log no longer holds all the ticks since the last
+        sync (log_retention shorter than the gap between syncs), or when full is set.
+        """
+        tracked = self._tracked[event_id]
+        event = tracked.event
+        log = event.combat_log
+
+        dirty = set()
+        deaths = {}
+        indices, cursor = log.since(tracked.cursor)
+        full = full or tracked.cursor < log.first_seq
+
+        for idx in indices:
+            for tick, kind, actor, target, _ in log.records(idx):
+                if kind == HIT:
+                    dirty.add(target)
+                elif kind == MOVE:
+                    dirty.add(actor)
+                elif kind == DEATH:
+                    deaths[actor] = tick
+
+        joined = []
+        if event.next_entity_id > tracked.next_entity_id:
+            joined = [e for e in event.players + event.enemies if e.id >= tracked.next_entity_id]
+            tracked.entities.update((e.id, e) for e in joined)
+            tracked.next_entity_id = event.next_entity_id
+
+        if full:
+            alive = {e.id for e in event.players + event.enemies}
+            deaths.update((eid, event.tick_count) for eid in tracked.entities if eid not in alive)
+            dirty = alive
+
+        entities = tracked.entities
+        new = {e.id for e in joined}
+        # entities that joined and died between two syncs were never written, there is no row to mark
+        dead = [(entities[eid].health, entities[eid].position, tick, event_id, eid)
+                for eid, tick in deaths.items() if eid in entities]
+        # joined rows are inserted with their current state already
+        moved = [(entities[eid].position, entities[eid].health, event_id, eid)
+                 for eid in dirty if eid in entities and eid not in deaths and eid not in new]
+
+        with self.conn:
+            self._insert(event_id, joined)
+            self.conn.executemany('UPDATE entities SET position = ?, health = ? WHERE event_id = ? AND id = ?', moved)
+            self.conn.executemany('UPDATE entities SET health = ?, position = ?, died = ? '
+                                  'WHERE event_id = ? AND id = ?', dead)
+            self._update_event(event_id, event)
+
+        for eid in deaths:
+            entities.pop(eid, None)
+        tracked.cursor = cursor
+
+        return len(joined) + len(moved) + len(dead)
+
+    def load(self, event_id: int, **kwargs):
+        """
+        Rebuild an event with its living entities and rng state, and track it under the same event_id
+
+        kwargs are Event options, size, seed, engine and headless default to the stored ones.
+        """
+        from event import Event
+
+        row = self.conn.execute('SELECT size, seed, seed_is_int, engine, headless, active, tick_count, next_entity_id, '
+                                'rng FROM events WHERE id = ?', (event_id,)).fetchone()
+        if row is None:
+            raise KeyError(f'no event {event_id}')
+
+        size, seed, seed_is_int, engine, headless, active, tick_count, next_entity_id, rng = row
+        kwargs.setdefault('seed', int(seed) if seed_is_int else seed)
+        kwargs.setdefault('engine', engine)
+        kwargs.setdefault('headless', bool(headless))
+        event = Event(size, **kwargs)
+        event.tick_count = tick_count
+        event.active = bool(active)
+
+        # players first, both teams in join order like the event's lists
+        rows = self.conn.execute(f'SELECT {", ".join(COLUMNS)} FROM entities '
+                                 f'WHERE event_id = ? AND died IS NULL ORDER BY isplayer DESC, id', (event_id,))
+
+        for (eid, isplayer, name, attackrate, damage, max_health, health, range_, speed, max_targets, initiative,
+             position, last_attack, stance) in rows:
+            entity = Entity(name=name, attackrate=attackrate, damage=damage, health=max_health, range=range_,
+                            speed=speed, stance=stance, initiative=initiative, max_targets=max_targets)
+            entity.id = eid
+            entity.health = health
+            entity.position = position
+            entity.last_attack = last_attack
+            entity.isplayer = bool(isplayer)
+            event.rejoin(entity)
+
+        event.next_entity_id = next_entity_id
+        unpack_rng(event, rng)
+
+        self._tracked[event_id] = _Tracked(event)
+        return event
+
+    def forget(self, event_id: int) -> None:
+        """Stop tracking an event, its rows stay"""
+        self._tracked.pop(event_id, None)
+
+    def active_events(self) -> list[int]:
+        return [eid for (eid,) in self.conn.execute('SELECT id FROM events WHERE active = 1 ORDER BY id')]
+
+    def entities(self, event_id: int, alive: bool = False) -> list[dict]:
+        """Rows of an event's entities as dicts, only the living if alive is set"""
+        query = f'SELECT {", ".join(COLUMNS)}, died FROM entities WHERE event_id = ?'
+        query += ' AND died IS NULL ORDER BY isplayer DESC, id' if alive else ' ORDER BY id'
+
+        return [dict(zip(COLUMNS + ('died',), row)) for row in self.conn.execute(query, (event_id,))]
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> EventStore:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from entity import Entity
+
+
+@dataclass(frozen=True, slots=True)
+class Template:
+    """
+    Immutable stat block of an entity class, stored once and shared by everything spawned from it
+
+    Spawned entities point at the template's name, stance and stat values instead of carrying their own copies, only
+    health, position and targets are per instance. See Event.spawn.
+    """
+    name: str
+    attackrate: int
+    damage: int
+    health: int
+    range: int
+    speed: int
+    stance: str
+    initiative: int = 0
+    max_targets: int = 1
+
+    def __post_init__(self) -> None:
+        # same coercion Entity.__init__ does, done once here instead of on every spawn
+        for name in ('attackrate', 'damage', 'health', 'range', 'speed', 'initiative', 'max_targets'):
+            object.__setattr__(self, name, int(getattr(self, name)))
+
+    def create(self, name: str | None = None) -> Entity:
+        """A single entity of this class, not yet on any field"""
+        return Entity.from_template(self, name)
+
+
+PIKEMAN = Template(name='Pikeman', attackrate=1, damage=1, health=15, range=2, speed=1, max_targets=2,
+                   stance='skirmish', initiative=5)
+BERSERKER = Template(name='Berserker', attackrate=1, damage=5, health=10, range=1, speed=4, stance='skirmish',
+                     initiative=10)
+ARCHER = Template(name='Archer', attackrate=1, damage=1, health=5, range=4, speed=3, stance='skirmish')
+SWORDMAN = Template(name='Swordman', attackrate=1, damage=2, health=20, range=1, speed=2, stance='skirmish',
+                    initiative=5)
+MAGE = Template(name='Mage', attackrate=1, damage=1, health=5, range=3, speed=2, stance='skirmish', max_targets=3)
+CAVALRY = Template(name='Cavalry', attackrate=1, damage=3, health=15, range=2, speed=8, stance='assassin',
+                   max_targets=2)
+
+# the demo classes, in the order big_random_battle picks from
+CLASSES = (PIKEMAN, BERSERKER, ARCHER, SWORDMAN, MAGE, CAVALRY)
@@ -0,0 +1,43 @@
+import logging
+
+from event import Event
+from templates import CLASSES
+
+
+def battle(**kwargs) -> Event:
+    event = Event(100, headless=True, seed=5, **kwargs)
+    event.spawn(CLASSES[0], 5, 'players')
+    event.spawn(CLASSES[1], 5, 'enemies')
+    return event
+
+
+def test_headless_entries_are_stamped_with_their_tick():
+    event = battle()
+    event.step(4)
+
+    assert [event.combat_log.time(i) for i in range(len(event.combat_log))] == [1, 2, 3, 4]
+    assert [frame['time'] for frame in event.read_status_log()] == [1, 2, 3, 4]
+
+    for tick in range(1, 5):
+        (combat,) = event.read_combat_log(min_time=tick, max_time=tick)
+        (status,) = event.read_status_log(min_time=tick, max_time=tick)
+        assert combat['time'] == status['time'] == tick
+
+
+def test_headless_pre_battle_entry_is_stamped_0():
+    event = battle()
+    event.update_status_log()
+    event.update_combat_log()
+    event.step(2)
+
+    assert [event.combat_log.time(i) for i in range(len(event.combat_log))] == [0, 1, 2]
+    assert [frame['time'] for frame in event.read_status_log()] == [0, 1, 2]
+
+
+def test_debug_leaves_logging_config_alone():
+    logger = logging.getLogger('event')
+    before = logger.level, list(logger.handlers), logger.propagate
+
+    battle(debug=True).step(2)
+
+    assert (logger.level, logger.handlers, logger.propagate) == before
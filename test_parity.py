@@ -0,0 +1,99 @@
+"""
+The fast paths have to reproduce the simple ones exactly, these pin that down for fixed seeds
+"""
+import random
+
+import pytest
+
+from event import Event
+from generators import FIRST_CORPUS, LAST_CORPUS, MONSTERS_CORPUS
+from markov import MarkovNameGenerator
+from templates import CLASSES
+
+
+# (seed, field size, entities per side), the narrow fields crowd entities onto shared positions. Spawns land up to
+# 19 + initiative from the centre, so fields under 40 would start entities off the field
+BATTLES = [(1, 100, 20), (2, 40, 60), (3, 500, 60), ('orc', 41, 80)]
+
+# update_targets arguments of the built-in stances, and the other orders of keys a full scan can rank by
+TARGETING = [('distance', False, False), ('distance', False, True), ('range', True, True), ('range', False, False)]
+
+
+def battle(seed, size: int, teamsize: int, **kwargs) -> Event:
+    event = Event(size, headless=True, seed=seed, **kwargs)
+    draw = random.Random(str(seed))
+
+    for team in ('players', 'enemies'):
+        for _ in range(teamsize):
+            event.spawn(CLASSES[draw.randrange(len(CLASSES))], 1, team)
+
+    return event
+
+
+def state(event: Event) -> tuple:
+    return ([(e.id, e.position, e.health) for e in event.players], [(e.id, e.position, e.health) for e in event.enemies])
+
+
+def run(event: Event, limit: int = 500) -> None:
+    while event.active and event.tick_count < limit:
+        event.step(1)
+
+
+@pytest.mark.parametrize('seed, size, teamsize', BATTLES)
+def test_array_engine_matches_object_engine(seed, size, teamsize):
+    pytest.importorskip('numpy')
+    ours = battle(seed, size, teamsize)
+    theirs = battle(seed, size, teamsize, engine='array')
+
+    while ours.active and ours.tick_count < 500:
+        ours.step(1)
+        theirs.step(1)
+        assert state(theirs) == state(ours), f'tick {ours.tick_count}'
+
+    assert theirs.active == ours.active
+    assert theirs.read_combat_log() == ours.read_combat_log()
+    assert theirs.read_combat_log_buffer() == ours.read_combat_log_buffer()
+
+
+@pytest.mark.parametrize('seed, size, teamsize', BATTLES)
+def test_indexed_targeting_matches_full_scan(seed, size, teamsize):
+    event = battle(seed, size, teamsize)
+
+    while event.active and event.tick_count < 500:
+        for entity in event.players + event.enemies:
+            for args in TARGETING:
+                expected = entity._scan_targets(*args)
+                assert entity.update_targets(*args) == expected, (event.tick_count, entity.id, args)
+
+        event.step(1)
+
+
+@pytest.mark.parametrize('seed, size, teamsize', BATTLES)
+def test_replay_matches_the_original(seed, size, teamsize):
+    event = battle(seed, size, teamsize)
+    event.step(3)
+    snapshot = event.snapshot()
+    run(event, 40)
+
+    replayed = Event.replay(snapshot, event.tick_count)
+
+    assert replayed.tick_count == event.tick_count
+    assert state(replayed) == state(event)
+    assert replayed.read_combat_log() == event.read_combat_log(min_time=4)
+    assert [rng.getstate() for rng in replayed.rng_streams()] == [rng.getstate() for rng in event.rng_streams()]
+
+
+def test_markov_names_per_seed_are_unchanged():
+    first = ['Lestony', 'Elie', 'Nor', 'Benathomia', 'Chlophiago', 'Jace', 'Chria', 'Leauston']
+    monsters = ['Merytorid', 'Micoul', 'Blinotarpy', 'Bancient', 'Tice giant', 'Bast', 'Medusalaticorm g', 'Min']
+
+    for corpus, expected in ((FIRST_CORPUS, first), (MONSTERS_CORPUS, monsters)):
+        for avoid_training in (False, True):
+            gen = MarkovNameGenerator(order=3, seed=7)
+            gen.fit(corpus)
+            assert list(gen.generate_many(k=8, max_len=16, min_len=3, avoid_training=avoid_training)) == expected
+
+    gen = MarkovNameGenerator(order=2, seed='orc')
+    gen.fit(LAST_CORPUS)
+    assert [gen.generate(max_len=12, min_len=3) for _ in range(6)] == ['Batinez', 'Was', 'Bezmarrsca', 'Phibuithonng',
+                                                                       'Hongals', 'Har']
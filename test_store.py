@@ -0,0 +1,19 @@
+import pytest
+
+from event import Event
+from store import EventStore
+from templates import CLASSES
+
+
+@pytest.mark.parametrize('seed', [5, 2**70, 'abc', '5'])
+def test_load_keeps_the_seed_type(tmp_path, seed):
+    event = Event(100, headless=True, seed=seed)
+    event.spawn(CLASSES[0], 3, 'players')
+    event.spawn(CLASSES[1], 3, 'enemies')
+    event.step(2)
+
+    with EventStore(str(tmp_path / 'events.db')) as store:
+        loaded = store.load(store.add(event))
+
+    assert loaded.seed == seed and type(loaded.seed) is type(seed)
+    assert Event.restore(loaded.snapshot()).seed == seed
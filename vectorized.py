@@ -0,0 +1,262 @@
+from __future__ import annotations
+from logs import DEATH, HIT, MOVE
+from stances import kernel
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# stance codes of the stances.py kernels this engine has a batched equivalent of
+STANCES = {'skirmish': 0, 'assassin': 1}
+SKIRMISH = 0
+ASSASSIN = 1
+
+
+class ArrayEngine:
+    """
+    Struct-of-arrays tick engine for an Event
+
+    Holds position, health, damage, range, speed, max_targets, stance and team in NumPy arrays (players first, then
+    enemies, both in list order) and runs a whole tick as batched array operations. Decisions, random draws, combat
+    log lines and list removals happen in the same order as the object engine, so a fixed seed gives the same battle.
+
+    Entity objects are written back to after each tick, but are only read from when the roster changes (stale).
+    """
+
+    def __init__(self, event) -> None:
+        if np is None:
+            raise ImportError("numpy is required for the array engine, install it or use engine='object'")
+
+        self.event = event
+        self.stale = True
+        self.entities = []
+        self.nplayers = 0
+
+    def load(self) -> None:
+        """Gather entity state from the event's lists into arrays"""
+        ev = self.event
+        self.entities = ev.players + ev.enemies
+        self.nplayers = len(ev.players)
+
+        for stance in {e.stance for e in self.entities}.difference(STANCES):
+            # unknown stances raise like they do on the object engine, registered ones can't run here
+            kernel(stance)
+            raise ValueError(f"stance '{stance}' has no array engine kernel, use engine='object'")
+
+        columns = [(e.position, e.health, e.damage, e.range, e.speed, e.max_targets, STANCES[e.stance])
+                   for e in self.entities]
+        data = np.array(columns, dtype=np.int64).reshape(len(columns), 7)
+        (self.position, self.health, self.damage, self.range, self.speed,
+         self.max_targets, self.stance) = (data[:, i].copy() for i in range(7))
+
+        # sticky targeting breaks ties by id, only the order of ids within a team matters
+        self.id_rank = np.empty(len(self.entities), dtype=np.int64)
+        for lo, hi in ((0, self.nplayers), (self.nplayers, len(self.entities))):
+            ids = [e.id for e in self.entities[lo:hi]]
+            self.id_rank[lo:hi] = np.argsort(sorted(range(len(ids)), key=ids.__getitem__))
+
+        self.stale = False
+
+    def _nearest(self, opos, orank, qpos, k: int, exclude: int | None = None):
+        """
+        (len(qpos), k) indices of the k opponents closest to each query position, -1 where there aren't enough
+
+        Ties at equal distance go to the lower orank. Candidates are the first k found walking the ring in each
+        direction, which always contains the true k nearest.
+        """
+        size = self.event.size
+        m = len(opos)
+        # one spare per direction so the excluded opponent can't crowd out a real candidate
+        steps = np.arange(k if exclude is None else k + 1)
+        ring = opos % size
+
+        order_r = np.lexsort((orank, ring))
+        order_l = np.lexsort((orank, -ring))
+        start_r = np.searchsorted(ring[order_r], qpos % size, side='left')
+        start_l = np.searchsorted(-ring[order_l], -(qpos % size), side='left')
+        cand = np.concatenate((order_r[(start_r[:, None] + steps) % m],
+                               order_l[(start_l[:, None] + steps) % m]), axis=1)
+
+        delta = np.abs(qpos[:, None] - opos[cand])
+        invalid = np.iinfo(np.int64).max
+        key = np.minimum(delta, size - delta) * (orank.max() + 1) + orank[cand]
+        if exclude is not None:
+            key[cand == exclude] = invalid
+
+        order = np.argsort(key, axis=1, kind='stable')
+        cand = np.take_along_axis(cand, order, axis=1)
+        key = np.take_along_axis(key, order, axis=1)
+
+        # the same opponent can be reached from both directions
+        drop = key == invalid
+        drop[:, 1:] |= cand[:, 1:] == cand[:, :-1]
+        order = np.argsort(drop, axis=1, kind='stable')[:, :k]
+        cand = np.take_along_axis(cand, order, axis=1)
+        cand[np.take_along_axis(drop, order, axis=1)] = -1
+
+        return cand
+
+    def _acquire(self):
+        """(N, K) global indices of each entity's targets in priority order, -1 padded"""
+        n = len(self.entities)
+        k = max(int(self.max_targets.max()), 1)
+        targets = np.full((n, k), -1, dtype=np.int64)
+        teams = ((0, self.nplayers), (self.nplayers, n))
+
+        for (qlo, qhi), (olo, ohi) in (teams, teams[::-1]):
+            opos = self.position[olo:ohi]
+            rows = np.arange(qlo, qhi)
+            stance = self.stance[rows]
+
+            # skirmish: closest first, ties by list order
+            skirm = rows[stance == SKIRMISH]
+            if len(skirm):
+                ks = max(int(self.max_targets[skirm].max()), 1)
+                found = self._nearest(opos, np.arange(ohi - olo), self.position[skirm], ks)
+                targets[skirm, :ks] = np.where(found >= 0, found + olo, -1)
+
+            # assassin: greatest range first, ties by id, then closest with ties in that same order
+            assassin = rows[stance == ASSASSIN]
+            if len(assassin):
+                prio = np.empty(ohi - olo, dtype=np.int64)
+                prio[np.lexsort((self.id_rank[olo:ohi], -self.range[olo:ohi]))] = np.arange(ohi - olo)
+                primary = int(np.argmin(prio))
+                targets[assassin, 0] = primary + olo
+
+                ka = int(self.max_targets[assassin].max()) - 1
+                if ka > 0:
+                    found = self._nearest(opos, prio, self.position[assassin], ka, exclude=primary)
+                    targets[assassin, 1:ka + 1] = np.where(found >= 0, found + olo, -1)
+
+        targets[np.arange(k)[None, :] >= np.maximum(self.max_targets, 1)[:, None]] = -1
+
+        return targets
+
+    def tick(self) -> None:
+        """Run one tick, Event._tick has already checked that the battle isn't over"""
+        ev = self.event
+
+        if self.stale:
+            self.load()
+
+        n = len(self.entities)
+        nplayers = self.nplayers
+
+        # nobody has joined yet
+        if not n:
+            return
+
+        size = ev.size
+        prof = ev.profiler
+        pos, rng, spd = self.position, self.range, self.speed
+        targets = self._acquire()
+        if prof:
+            prof.mark('targeting')
+        valid = targets >= 0
+        tgt = np.where(valid, targets, 0)
+
+        delta = np.abs(pos[:, None] - pos[tgt])
+        outer = delta > size - delta
+        dist = np.where(outer, size - delta, delta)
+
+        skirm = self.stance == SKIRMISH
+        acting = skirm | (self.stance == ASSASSIN)
+
+        not_in_atk_range = rng[:, None] < dist
+        kite_gain = np.minimum(rng, spd)[:, None] - rng[tgt]
+        worth_kiting = -(-kite_gain // np.maximum(spd[tgt], 1)) >= 2
+        in_enemy_range = rng[tgt] >= dist
+        kite = skirm[:, None] & worth_kiting & in_enemy_range
+
+        trigger = (not_in_atk_range | kite) & valid & acting[:, None]
+        will_move = trigger.any(axis=1)
+
+        # moves, decided against the first target that triggered one
+        movers = np.nonzero(will_move)[0]
+        first = trigger[movers].argmax(axis=1)
+        mtgt = tgt[movers, first]
+        mdist = dist[movers, first]
+
+        direction = np.where(pos[movers] < pos[mtgt], 1, -1)
+        direction = np.where(skirm[movers] & (mdist < rng[movers]), -direction, direction)
+        direction = np.where(outer[movers, first], -direction, direction)
+
+        same = skirm[movers] & (pos[movers] == pos[mtgt])
+        if same.any():
+            direction[same] *= [ev.tiebreak_rng.randint(-1, 1) for _ in range(int(same.sum()))]
+
+        steps = np.minimum(spd[movers], np.abs(mdist - rng[movers])) * direction
+        if prof:
+            prof.mark('actions')
+
+        # attacks, only for entities that stayed put
+        attacks = valid & (dist <= rng[:, None]) & ~will_move[:, None] & acting[:, None]
+        attackers, cols = np.nonzero(attacks)
+        victims = tgt[attackers, cols]
+        np.subtract.at(self.health, victims, self.damage[attackers])
+
+        ids = [e.id for e in self.entities]
+        for a, v, dmg in zip(attackers.tolist(), victims.tolist(), self.damage[attackers].tolist()):
+            ev.record_combat(HIT, ids[a], ids[v], dmg)
+
+        if prof:
+            prof.mark('attacks')
+
+        # deaths, enemies then players
+        removed = self.health <= 0
+
+        for i in np.nonzero(removed[nplayers:])[0].tolist():
+            ev.record_combat(DEATH, ids[i + nplayers])
+        for i in np.nonzero(removed[:nplayers])[0].tolist():
+            ev.record_combat(DEATH, ids[i])
+
+        if prof:
+            prof.mark('culling')
+
+        # moves of anything still on the field
+        keep_move = ~removed[movers]
+        movers, steps = movers[keep_move], steps[keep_move]
+        pos[movers] = (pos[movers] + steps) % size
+
+        for i, step in zip(movers.tolist(), steps.tolist()):
+            ev.record_combat(MOVE, ids[i], amount=step)
+
+        if prof:
+            prof.mark('moves')
+
+        self._write_back(np.unique(victims), movers, removed)
+
+        # dropping the dead from the arrays and lists is culling work
+        if prof:
+            prof.mark('culling')
+            prof.count('attacks', len(attackers))
+            prof.count('moves', len(movers))
+            prof.count('deaths', int(removed.sum()))
+
+    def _write_back(self, hit, moved, removed) -> None:
+        """Copy changed state onto the entity objects and drop removed entities from the event"""
+        ev = self.event
+        entities = self.entities
+
+        for i, health in zip(hit.tolist(), self.health[hit].tolist()):
+            entities[i].health = health
+
+        for i, position in zip(moved.tolist(), self.position[moved].tolist()):
+            entities[i].position = position
+
+        if removed.any():
+            keep = ~removed
+            self.entities = [e for e, k in zip(entities, keep.tolist()) if k]
+            self.nplayers = int(keep[:self.nplayers].sum())
+
+            for name in ('position', 'health', 'damage', 'range', 'speed', 'max_targets', 'stance', 'id_rank'):
+                setattr(self, name, getattr(self, name)[keep])
+
+            ev.players[:] = self.entities[:self.nplayers]
+            ev.enemies[:] = self.entities[self.nplayers:]
+
+        if len(moved) or removed.any():
+            ev.target_cache.reset()
+            ev.indexes_stale = True